@@ -1,9 +1,39 @@
-import numpy as np
-from detect_anomalies_zscore import detect_anomalies_zscore, zscore_anomaly_detection_optimized
-from detect_anomalies_emwa import detect_anomalies_ewma
-from detect_anomalies_sh_esd import sh_esd, perform_esd_test
-from visualize_data import visualize_anomalies, visualize_anomalies_static
-from generate_data import generate_arima_data, generate_brownian_motion, generate_garch_data, generate_poisson_process, generate_random_walk, generate_seasonal_data, add_anomalies
+import importlib
+
+# Detectors, generators and plotting pull in scipy, pandas, statsmodels and matplotlib,
+# which take seconds to import. They are loaded on first use instead of at startup:
+# main() imports what the selected options need, and the names below can still be
+# imported from this module through __getattr__.
+_LAZY_IMPORTS = {
+    'detect_anomalies_zscore': 'detect_anomalies_zscore',
+    'zscore_anomaly_detection_optimized': 'detect_anomalies_zscore',
+    'detect_anomalies_ewma': 'detect_anomalies_emwa',
+    'sh_esd': 'detect_anomalies_sh_esd',
+    'perform_esd_test': 'detect_anomalies_sh_esd',
+    'visualize_anomalies': 'visualize_data',
+    'visualize_anomalies_static': 'visualize_data',
+    'load_data_file': 'data_io',
+    'generate_arima_data': 'generate_data',
+    'generate_brownian_motion': 'generate_data',
+    'generate_garch_data': 'generate_data',
+    'generate_poisson_process': 'generate_data',
+    'generate_random_walk': 'generate_data',
+    'generate_seasonal_data': 'generate_data',
+    'add_anomalies': 'generate_data',
+}
+
+# S-H-ESD period used when none can be detected in the data
+DEFAULT_PERIOD = 100
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
 
 def main():
     # This menu system allows users to interactively select options for generating and analyzing time series data.
@@ -28,7 +58,8 @@ def main():
                 print("3. GARCH (Generalized Autoregressive Conditional Heteroskedasticity)")
                 print("4. Poisson Process for Transaction Counts")
                 print("5. Seasonal Data with Noise")
-                generation_method = input("Your choice (1-5): ")
+                print("6. Random Walk")
+                generation_method = input("Your choice (1-6): ")
 
                 while True:
                     try:
@@ -43,6 +74,7 @@ def main():
                         print("3. GARCH (Generalized Autoregressive Conditional Heteroskedasticity)")
                         print("4. Poisson Process for Transaction Counts")
                         print("5. Seasonal Data with Noise")
+                        print("6. Random Walk")
                         generation_method = input("Please enter your choice (1-6): ")
 
                 method_choice = int(generation_method)
@@ -69,6 +101,9 @@ def main():
                         num_anomalies = input("Invalid input. Please enter a valid number of anomalies between 1 and {}: ".format(num_data_points // 10))
 
                 print("Generating random data points...")
+                from generate_data import (add_anomalies, generate_arima_data, generate_brownian_motion,
+                                           generate_garch_data, generate_poisson_process, generate_random_walk,
+                                           generate_seasonal_data)
                 try:
                     if method_choice == 1:
                         data_stream = generate_arima_data(steps=num_data_points)
@@ -80,6 +115,8 @@ def main():
                         data_stream = generate_poisson_process(steps=num_data_points)
                     elif method_choice == 5:
                         data_stream = generate_seasonal_data(steps=num_data_points)
+                    elif method_choice == 6:
+                        data_stream = generate_random_walk(steps=num_data_points)
                 except Exception as e:
                     print(f"An error occurred during data generation: {e}")
                     continue
@@ -95,9 +132,9 @@ def main():
                 print("The file should contain a 1D time series of floating point numbers,")
                 print("each on a new line. Please see the example.txt file for reference.")
                 file_path = input("Please provide the path to the file: ")
+                from data_io import load_data_file
                 try:
-                    with open(file_path, 'r') as file:
-                        data_stream = np.genfromtxt(file, skip_header=1, dtype=None, encoding=None)
+                    data_stream = load_data_file(file_path, skip_header=1)
                 except FileNotFoundError:
                     raise ValueError("The file path is not valid. Please ensure the file exists.")
             elif choice == 3:
@@ -120,12 +157,21 @@ def main():
                 detection_method = input("Invalid input. Please enter a valid number for the detection method (1-3): ")
                 
         if detection_method == 1:
+            from detect_anomalies_zscore import detect_anomalies_zscore
             anomalies = detect_anomalies_zscore(data_stream)
         elif detection_method == 2:
+            from detect_anomalies_emwa import detect_anomalies_ewma
             anomalies = detect_anomalies_ewma(data_stream)
         elif detection_method == 3:
+            from detect_anomalies_sh_esd import detect_period, sh_esd
+            period = detect_period(data_stream)
+            if period is None:
+                print(f"No seasonal period detected, using the default of {DEFAULT_PERIOD}.")
+                period = DEFAULT_PERIOD
+            else:
+                print(f"Detected seasonal period: {period}")
             try:
-                anomalies = sh_esd(data_stream, period=100, max_anomalies=0.05)
+                anomalies = sh_esd(data_stream, period=period, max_anomalies=0.05)
             except ValueError as e:
                 # Handle the error (log, print, or fallback) and continue execution
                 print(f"An error occurred during anomaly detection: {e}")
@@ -141,6 +187,7 @@ def main():
             except ValueError:
                 visualization_mode = input("Invalid input. Please enter a valid number for the visualization mode (1-2): ")
         
+        from visualize_data import visualize_anomalies, visualize_anomalies_static
         if visualization_mode == 1:
             visualize_anomalies_static(data_stream, anomalies, detection_methods[detection_method-1])
         elif visualization_mode == 2:
@@ -148,5 +195,6 @@ def main():
 
     print("Thank you for using the Anomaly Detection Tool. Have a great day!")
 
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
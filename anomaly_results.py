@@ -0,0 +1,211 @@
+import numpy as np
+
+from data_io import BINARY_HEADER
+
+# One record per detected anomaly when scanning many series at once
+ANOMALY_DTYPE = np.dtype([
+    ('series_id', np.int32),
+    ('index', np.int64),
+    ('value', np.float64),
+    ('score', np.float32),
+])
+
+
+def anomaly_records(series_ids, indices, values, scores):
+    """
+    Packs parallel arrays of anomaly fields into a structured array.
+
+    Parameters:
+    - series_ids: np.array
+        Row of each anomaly in the (num_series, length) input.
+    - indices: np.array
+        Position of each anomaly within its series.
+    - values: np.array
+        Value reported for each anomaly.
+    - scores: np.array
+        Detector score of each anomaly (e.g. the Z-score).
+
+    Returns:
+    - records: np.array with dtype ANOMALY_DTYPE
+        Records sorted by series_id, then index.
+    """
+    records = np.empty(len(indices), dtype=ANOMALY_DTYPE)
+    records['series_id'] = series_ids
+    records['index'] = indices
+    records['value'] = values
+    records['score'] = scores
+    records.sort(order=['series_id', 'index'], kind='stable')
+    return records
+
+
+def as_series_matrix(data):
+    """
+    Validates a (num_series, length) input and converts it to float64.
+
+    A single 1-D series is accepted and treated as one row.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim == 1:
+        data = data[np.newaxis, :]
+    if data.ndim != 2:
+        raise ValueError(f"Expected an array of shape (num_series, length), but got shape {data.shape}.")
+    return data
+
+
+def deduplicate_records(records):
+    """
+    Sorts anomaly records by series_id and index and keeps one record per (series_id, index).
+    """
+    records = records[np.lexsort((records['index'], records['series_id']))]
+    keep = np.ones(len(records), dtype=bool)
+    keep[1:] = (np.diff(records['series_id']) != 0) | (np.diff(records['index']) != 0)
+    return records[keep]
+
+
+# Detector ids stored in the uint8 detector column of AnomalyResult
+DETECTOR_IDS = {
+    'unknown': 0,
+    'zscore': 1,
+    'zscore_optimized': 2,
+    'ewma': 3,
+    'sh_esd': 4,
+}
+
+# Binary layout: a BINARY_HEADER, then the index, value, score and detector columns back to back
+RESULT_MAGIC = b'ANOMRES\x00'
+RESULT_VERSION = 1
+
+
+class AnomalyResult:
+    """
+    Compact anomaly list backed by parallel NumPy arrays.
+
+    Stores each anomaly in 21 bytes (index int64, value float64, score float32,
+    detector id uint8) instead of a Python tuple. The whole-series detectors
+    (`detect_anomalies_zscore`, `zscore_anomaly_detection_optimized`,
+    `detect_anomalies_ewma`, `sh_esd`) return it. It still behaves like the list of
+    (index, value) tuples they used to return: iterating, indexing with an int and
+    comparing with a list produce tuples on demand, while slicing returns another
+    AnomalyResult that shares memory with this one.
+
+    Parameters:
+    - index: array of int
+        Position of each anomaly in the data stream.
+    - value: array of float
+        Value reported for each anomaly.
+    - score: array of float, optional (default=None)
+        Detector score of each anomaly; NaN when not given.
+    - detector: str, int or array, optional (default='unknown')
+        Detector name from DETECTOR_IDS, or ids per anomaly.
+    """
+
+    def __init__(self, index, value, score=None, detector='unknown'):
+        self.index = np.asarray(index, dtype=np.int64)
+        self.value = np.asarray(value, dtype=np.float64)
+        count = len(self.index)
+        if len(self.value) != count:
+            raise ValueError("index and value must have the same length.")
+        if score is None:
+            score = np.full(count, np.nan, dtype=np.float32)
+        self.score = np.asarray(score, dtype=np.float32)
+        if isinstance(detector, str):
+            if detector not in DETECTOR_IDS:
+                raise ValueError(f"Unknown detector '{detector}'. Choose from {sorted(DETECTOR_IDS)}.")
+            detector = DETECTOR_IDS[detector]
+        self.detector = np.broadcast_to(np.asarray(detector, dtype=np.uint8), (count,))
+        if len(self.score) != count:
+            raise ValueError("score must have the same length as index.")
+
+    @classmethod
+    def from_tuples(cls, anomalies, score=None, detector='unknown'):
+        """
+        Builds a result from a detector's list of (index, value) tuples.
+        """
+        if not len(anomalies):
+            return cls(np.empty(0, dtype=np.int64), np.empty(0), score, detector)
+        index, value = zip(*anomalies)
+        return cls(index, value, score, detector)
+
+    @classmethod
+    def from_records(cls, records, detector='unknown'):
+        """
+        Builds a result from multi-series records with dtype ANOMALY_DTYPE (series ids are dropped).
+        """
+        return cls(records['index'], records['value'], records['score'], detector)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return AnomalyResult(self.index[item], self.value[item], self.score[item], self.detector[item])
+        return (int(self.index[item]), float(self.value[item]))
+
+    def __eq__(self, other):
+        if isinstance(other, AnomalyResult):
+            return (np.array_equal(self.index, other.index) and np.array_equal(self.value, other.value)
+                    and np.array_equal(self.score, other.score, equal_nan=True)
+                    and np.array_equal(self.detector, other.detector))
+        if isinstance(other, (list, tuple)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"AnomalyResult({len(self)} anomalies)"
+
+    def to_list(self):
+        """
+        Materializes the (index, value) tuple list.
+        """
+        return list(zip(self.index.tolist(), self.value.tolist()))
+
+    @property
+    def nbytes(self):
+        return self.index.nbytes + self.value.nbytes + self.score.nbytes + len(self)
+
+    def save(self, file_path):
+        """
+        Writes the result to a binary file: a 24-byte header followed by the four columns.
+        """
+        with open(file_path, 'wb') as file:
+            file.write(BINARY_HEADER.pack(RESULT_MAGIC, RESULT_VERSION, 0, 0, len(self)))
+            for column in (self.index, self.value, self.score, np.ascontiguousarray(self.detector)):
+                file.write(column.astype(column.dtype.newbyteorder('<'), copy=False).tobytes())
+
+    @classmethod
+    def load(cls, file_path, mmap=False):
+        """
+        Reads a result written by `save`.
+
+        Parameters:
+        - file_path: str
+            Path of the file.
+        - mmap: bool, optional (default=False)
+            Memory-map the columns instead of reading them into memory.
+        """
+        with open(file_path, 'rb') as file:
+            header = file.read(BINARY_HEADER.size)
+        if len(header) < BINARY_HEADER.size:
+            raise ValueError(f"{file_path} is not an anomaly result file.")
+        magic, version, _, _, count = BINARY_HEADER.unpack(header)
+        if magic != RESULT_MAGIC:
+            raise ValueError(f"{file_path} is not an anomaly result file.")
+        if version != RESULT_VERSION:
+            raise ValueError(f"Unsupported anomaly result file version {version}.")
+
+        columns = []
+        offset = BINARY_HEADER.size
+        for dtype in ('<i8', '<f8', '<f4', 'u1'):
+            if mmap and count:
+                column = np.memmap(file_path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+            else:
+                column = np.fromfile(file_path, dtype=dtype, count=count, offset=offset)
+            columns.append(column)
+            offset += count * np.dtype(dtype).itemsize
+        return cls(*columns)
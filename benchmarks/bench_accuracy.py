@@ -0,0 +1,124 @@
+"""
+Accuracy and throughput of every detector on series with labelled injected anomalies.
+
+Each generated series gets spikes, level shifts, variance bursts and collective anomalies
+from `inject_anomalies`, which returns the ground-truth label mask. Every detector is then
+timed on the series and scored against the labels:
+- point precision / recall / F1: flagged indices against labelled points,
+- event recall: fraction of injected anomalies (runs of labelled points) with at least one
+  flagged point.
+
+Usage:
+    python benchmarks/bench_accuracy.py --sizes 100000 10000000 --generators seasonal random_walk
+    python benchmarks/bench_accuracy.py --output accuracy.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_benchmarks import DETECTOR_SIZE_CAPS, DETECTORS, GENERATORS
+
+
+def make_series(generator, size, anomaly_rate, duration, seed=0):
+    """
+    Generated series with `anomaly_rate * size` spikes and a quarter as many anomalies of
+    each segment kind.
+
+    Returns:
+    - data: np.array
+    - labels: np.array of bool
+    """
+    import generate_data
+
+    rng = np.random.default_rng(seed)
+    data = getattr(generate_data, GENERATORS[generator])(steps=size, rng=rng)
+    spikes = max(int(size * anomaly_rate), 1)
+    segments = max(spikes // 4, 1) if size >= 10 * duration else 0
+    return generate_data.inject_anomalies(data, spikes=spikes, level_shifts=segments,
+                                          variance_bursts=segments, collective=segments,
+                                          duration=duration, rng=rng)
+
+
+def score(anomalies, labels):
+    """
+    Point precision, recall and F1, and event recall of the flagged anomalies.
+
+    Parameters:
+    - anomalies: list of (index, value) tuples returned by a detector.
+    - labels: np.array of bool, ground truth.
+
+    Returns:
+    - dict
+    """
+    flagged = np.zeros(len(labels), dtype=bool)
+    indices = np.fromiter((index for index, _ in anomalies), dtype=np.int64, count=len(anomalies))
+    flagged[indices] = True
+
+    true_positives = np.count_nonzero(flagged & labels)
+    precision = true_positives / max(np.count_nonzero(flagged), 1)
+    recall = true_positives / max(np.count_nonzero(labels), 1)
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    # Runs of labelled points are events; an event is detected if any of its points is flagged
+    edges = np.diff(labels.astype(np.int8), prepend=0, append=0)
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    flagged_before = np.concatenate(([0], np.cumsum(flagged)))
+    hits = flagged_before[stops] - flagged_before[starts]
+    event_recall = np.count_nonzero(hits > 0) / max(len(starts), 1)
+
+    return {
+        'flagged': int(np.count_nonzero(flagged)),
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1': float(f1),
+        'events': int(len(starts)),
+        'event_recall': float(event_recall),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--detectors", nargs="+", choices=list(DETECTORS), default=list(DETECTORS))
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=['seasonal', 'random_walk'])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--anomaly-rate", type=float, default=0.001, help="Spikes per data point.")
+    parser.add_argument("--duration", type=int, default=50, help="Length of the segment anomalies.")
+    parser.add_argument("--no-caps", action="store_true", help="Ignore the per detector size caps.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'detector':<17} {'generator':<11} {'size':>9} {'seconds':>8} {'samples/s':>11} "
+          f"{'precision':>9} {'recall':>7} {'f1':>6} {'event recall':>12}")
+    for generator in args.generators:
+        for size in args.sizes:
+            data, labels = make_series(generator, size, args.anomaly_rate, args.duration, args.seed)
+            for detector in args.detectors:
+                if not args.no_caps and size > DETECTOR_SIZE_CAPS.get(detector, size):
+                    continue
+                DETECTORS[detector](data[:1000])  # Warm up, so lazy imports are not timed
+                start = time.perf_counter()
+                anomalies = DETECTORS[detector](data)
+                elapsed = time.perf_counter() - start
+                result = dict(detector=detector, generator=generator, size=size, seconds=elapsed,
+                              throughput=size / elapsed, **score(anomalies, labels))
+                results.append(result)
+                print(f"{detector:<17} {generator:<11} {size:>9} {elapsed:>8.3f} {result['throughput']:>11.0f} "
+                      f"{result['precision']:>9.3f} {result['recall']:>7.3f} {result['f1']:>6.3f} "
+                      f"{result['event_recall']:>12.3f}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+            output_file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark of the ESD test with mean/std scoring against median/MAD scoring.
+
+Runs `perform_esd_test` on residual-like data with injected spikes and reports runtime,
+the number of anomalies flagged and how many of them are injected spikes.
+
+Usage:
+    python benchmarks/bench_esd.py --sizes 10000 100000 1000000 --anomaly-rate 0.01
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detect_anomalies_sh_esd import perform_esd_test
+
+
+def generate_residuals(size, anomaly_rate, seed=0):
+    """
+    Standard normal residuals with `anomaly_rate * size` spikes of 4 to 10 standard deviations.
+    """
+    rng = np.random.default_rng(seed)
+    residuals = rng.normal(0, 1, size)
+    num_anomalies = int(size * anomaly_rate)
+    indices = rng.choice(size, num_anomalies, replace=False)
+    residuals[indices] += rng.choice([-1, 1], num_anomalies) * rng.uniform(4, 10, num_anomalies)
+    return residuals, set(indices.tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--anomaly-rate", type=float, default=0.01)
+    parser.add_argument("--max-anomalies", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'scoring':<10} {'seconds':>9} {'flagged':>8} {'injected hits':>14}")
+    for size in args.sizes:
+        residuals, injected = generate_residuals(size, args.anomaly_rate)
+        for name, robust in (("mean/std", False), ("median/MAD", True)):
+            start = time.perf_counter()
+            anomalies = perform_esd_test(residuals, args.max_anomalies, robust=robust)
+            elapsed = time.perf_counter() - start
+            hits = sum(1 for index, _ in anomalies if index in injected)
+            print(f"{size:>10} {name:<10} {elapsed:>9.4f} {len(anomalies):>8} "
+                  f"{hits:>7}/{len(injected):<6}")
+
+
+if __name__ == "__main__":
+    main()
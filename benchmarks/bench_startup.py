@@ -0,0 +1,141 @@
+"""
+Startup benchmark: cold import time of each code path, with a regression check.
+
+Every code path is timed in fresh interpreters, so nothing is served from an already
+populated `sys.modules`, and the best of `--repeats` runs is kept. Times are also reported
+relative to a plain `import numpy` measured in the same run, which makes the baseline
+comparable across machines. A path regresses when its relative time exceeds the baseline
+by more than `--tolerance` (a ratio) and by more than `--slack` seconds; the script then
+exits with status 1.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --update-baseline
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "startup_baseline.json")
+
+REFERENCE_PATH = "numpy"
+
+# Code path name -> statements whose import cost is measured
+CODE_PATHS = {
+    REFERENCE_PATH: "import numpy",
+    "anomaly_detection": "import anomaly_detection",
+    "cli": "import cli; cli.build_parser()",
+    "zscore_file": "import anomaly_detection, data_io, detect_anomalies_zscore",
+    "ewma": "import detect_anomalies_emwa",
+    "sh_esd": "import detect_anomalies_sh_esd",
+    "generate_data": "import generate_data",
+    "visualize": "import visualize_data",
+}
+
+_TIMER = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "{statements}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def time_import(statements, repeats=5):
+    """
+    Best wall-clock time of running `statements` in a fresh interpreter.
+
+    Parameters:
+    - statements: str, Python source executed with the repository root on sys.path.
+    - repeats: int, Number of fresh interpreters to start.
+
+    Returns:
+    - float: The smallest measured time in seconds.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", MPLBACKEND="Agg")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    best = float("inf")
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", _TIMER.format(statements=statements)],
+                                cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True)
+        best = min(best, float(output.stdout.strip().splitlines()[-1]))
+    return best
+
+
+def measure(paths, repeats=5):
+    """
+    Import times of the given code paths, absolute and relative to `import numpy`.
+
+    Returns:
+    - dict: Code path name -> {"seconds": float, "relative": float}.
+    """
+    reference = time_import(CODE_PATHS[REFERENCE_PATH], repeats)
+    results = {}
+    for name in paths:
+        seconds = reference if name == REFERENCE_PATH else time_import(CODE_PATHS[name], repeats)
+        results[name] = {"seconds": seconds, "relative": seconds / reference}
+    return results
+
+
+def find_regressions(results, baseline, tolerance, slack):
+    """
+    Code paths whose relative import time grew beyond the allowed tolerance.
+
+    Returns:
+    - list: (name, baseline relative time, measured relative time) tuples.
+    """
+    reference = results[REFERENCE_PATH]["seconds"]
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        allowed = baseline[name]["relative"]
+        limit = max(allowed * tolerance, allowed + slack / reference)
+        if result["relative"] > limit:
+            regressions.append((name, allowed, result["relative"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paths", nargs="+", choices=list(CODE_PATHS), default=list(CODE_PATHS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="Allowed ratio over the baseline relative time.")
+    parser.add_argument("--slack", type=float, default=0.05,
+                        help="Allowed absolute increase in seconds, for very fast paths.")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write the measured times to the baseline file instead of comparing.")
+    args = parser.parse_args()
+
+    paths = [REFERENCE_PATH] + [name for name in args.paths if name != REFERENCE_PATH]
+    results = measure(paths, args.repeats)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    print(f"{'code path':<18} {'seconds':>9} {'x numpy':>8} {'baseline':>9}")
+    for name, result in results.items():
+        reference = f"{baseline[name]['relative']:.2f}" if name in baseline else "-"
+        print(f"{name:<18} {result['seconds']:>9.4f} {result['relative']:>8.2f} {reference:>9}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance, args.slack)
+    for name, allowed, measured in regressions:
+        print(f"REGRESSION: {name} imports in {measured:.2f}x numpy, baseline {allowed:.2f}x")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
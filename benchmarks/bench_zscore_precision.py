@@ -0,0 +1,183 @@
+"""
+Precision and throughput benchmark for the rolling Z-score detectors.
+
+Compares the legacy raw-sums rolling variance, the Welford/re-anchored
+`zscore_anomaly_detection_optimized` and the vectorized batch detector against
+the exact per-window computation of `detect_anomalies_zscore`. It also checks that
+the detectors flag exactly the same points on integer (Poisson) data, where Z-scores
+hit the threshold exactly, including `StreamingZScoreDetector` fed in uneven blocks,
+and on series holding NaNs and infinities.
+Exits with status 1 if any detector disagrees with `detect_anomalies_zscore`.
+
+Usage:
+    python benchmarks/bench_zscore_precision.py --samples 200000 --offset 1e6
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detect_anomalies_zscore import (RollingMoments, StreamingZScoreDetector, detect_anomalies_zscore,
+                                     detect_anomalies_zscore_batch,
+                                     zscore_anomaly_detection_optimized)
+
+
+def generate_sensor_data(samples, offset, seed=0):
+    """
+    Generates a slowly drifting sensor signal sitting on a large constant offset.
+    """
+    rng = np.random.default_rng(seed)
+    drift = np.cumsum(rng.normal(0, 0.01, samples))
+    return offset + drift + rng.normal(0, 1, samples)
+
+
+def raw_sums_std(data_stream, window_size):
+    """
+    Rolling standard deviation using the legacy sum / sum-of-squares update.
+    """
+    stds = np.zeros(len(data_stream))
+    sum_vals = 0.0
+    sum_sq_vals = 0.0
+    for i, value in enumerate(data_stream):
+        sum_vals += value
+        sum_sq_vals += value ** 2
+        if i >= window_size:
+            old_value = data_stream[i - window_size]
+            sum_vals -= old_value
+            sum_sq_vals -= old_value ** 2
+        mean = sum_vals / window_size
+        variance = (sum_sq_vals / window_size) - (mean ** 2)
+        stds[i] = np.sqrt(variance) if variance > 0 else 0
+    return stds
+
+
+def rolling_moments_std(data_stream, window_size):
+    """
+    Rolling standard deviation using `RollingMoments`.
+    """
+    stds = np.zeros(len(data_stream))
+    moments = RollingMoments(window_size)
+    for i, value in enumerate(data_stream):
+        moments.push(value)
+        stds[i] = moments.std
+    return stds
+
+
+def exact_std(data_stream, window_size, positions):
+    """
+    Exact population standard deviation of the windows ending at `positions`.
+    """
+    return np.array([np.std(data_stream[i - window_size + 1:i + 1]) for i in positions])
+
+
+def flag_mismatches(data, window_size):
+    """
+    Number of points flagged differently from `detect_anomalies_zscore`, per detector.
+    """
+    with np.errstate(invalid='ignore'):
+        expected = {i for i, _ in detect_anomalies_zscore(data, window_size)}
+
+        detector = StreamingZScoreDetector(window_size)
+        streamed = set()
+        for block in np.array_split(data, 7):
+            streamed.update(i for i, _ in detector.update_batch(block))
+
+        flagged = {
+            "zscore_anomaly_detection_optimized": {i for i, _ in zscore_anomaly_detection_optimized(data, window_size)},
+            "StreamingZScoreDetector (blocks)": streamed,
+            "detect_anomalies_zscore_batch": set(detect_anomalies_zscore_batch(data, window_size).tolist()),
+        }
+    return len(expected), {name: len(found ^ expected) for name, found in flagged.items()}
+
+
+def tie_mismatches(samples, window_size, lam=2, seed=0):
+    """
+    `flag_mismatches` on Poisson data, where Z-scores hit the threshold exactly.
+    """
+    return flag_mismatches(np.random.default_rng(seed).poisson(lam, samples), window_size)
+
+
+def nonfinite_mismatches(samples, window_size, seed=0):
+    """
+    `flag_mismatches` on a normal series with spikes, a few NaNs, a run of NaNs and
+    infinities, some of them on the block edges of the batch detector.
+    """
+    rng = np.random.default_rng(seed)
+    data = rng.normal(0, 1, samples)
+    data[rng.choice(samples, samples // 200, replace=False)] += rng.choice([-8, 8], samples // 200)
+    data[rng.choice(samples, 3, replace=False)] = np.nan
+    data[[4096 + window_size, samples // 2]] = [np.nan, np.inf]
+    data[samples // 3:samples // 3 + window_size // 2] = np.nan
+    data[-1] = -np.inf
+    return flag_mismatches(data, window_size)
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200_000)
+    parser.add_argument("--window-size", type=int, default=50)
+    parser.add_argument("--offset", type=float, default=1e6)
+    parser.add_argument("--checkpoints", type=int, default=1000,
+                        help="Number of windows to compare against the exact std.")
+    args = parser.parse_args()
+
+    data = generate_sensor_data(args.samples, args.offset)
+    window_size = args.window_size
+    positions = np.linspace(window_size - 1, args.samples - 1, args.checkpoints).astype(int)
+    reference = exact_std(data, window_size, positions)
+
+    print(f"Precision ({args.samples} samples, offset {args.offset:g}, window {window_size})")
+    for name, func in (("raw sums (legacy)", raw_sums_std), ("RollingMoments", rolling_moments_std)):
+        stds = func(data, window_size)[positions]
+        rel_error = np.abs(stds - reference) / reference
+        zero = np.count_nonzero(stds == 0)
+        print(f"  {name:<20} max rel. error {rel_error.max():.3e}  "
+              f"median rel. error {np.median(rel_error):.3e}  zero std windows {zero}")
+
+    print("Throughput")
+    detectors = (
+        ("detect_anomalies_zscore",
+         lambda: [i for i, _ in detect_anomalies_zscore(data, window_size)]),
+        ("zscore_anomaly_detection_optimized",
+         lambda: [i for i, _ in zscore_anomaly_detection_optimized(data, window_size)]),
+        ("detect_anomalies_zscore_batch",
+         lambda: detect_anomalies_zscore_batch(data, window_size).tolist()),
+    )
+    expected, naive_time = None, None
+    failures = 0
+    for name, run in detectors:
+        anomalies, elapsed = time_call(run)
+        if expected is None:
+            expected, naive_time = anomalies, elapsed
+        failures += anomalies != expected
+        print(f"  {name:<36} {args.samples / elapsed:>14,.0f} samples/s  "
+              f"speedup {naive_time / elapsed:>7.1f}x  matches naive: {anomalies == expected}")
+
+    for lam, window in ((1, 5), (2, 10), (5, 20)):
+        flags, mismatches = tie_mismatches(min(args.samples, 50_000), window, lam)
+        print(f"Exact ties (Poisson lambda {lam}, window {window}, {flags} naive flags)")
+        for name, count in mismatches.items():
+            failures += count > 0
+            print(f"  {name:<36} differing flags {count}")
+
+    flags, mismatches = nonfinite_mismatches(min(args.samples, 50_000), window_size)
+    print(f"Non-finite values (window {window_size}, {flags} naive flags)")
+    for name, count in mismatches.items():
+        failures += count > 0
+        print(f"  {name:<36} differing flags {count}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Benchmark suite: every detector on data from every generator at sizes from 1e3 to 1e7.
+
+For each (detector, generator, size) case the detector is run repeatedly on the same
+seeded data, and the report records the minimum, median and maximum latency of a run,
+throughput in samples per second and the peak memory traced by tracemalloc during one
+extra run. A case runs only a handful of times, too few for tail percentiles, so none
+are reported. Results are
+written as a JSON report; `--compare` diffs two reports and exits with status 1 when a
+case slowed down by more than the tolerance.
+
+Slow detectors and generators are capped to the sizes they finish in reasonable time
+(see DETECTOR_SIZE_CAPS and GENERATOR_SIZE_CAPS); `--no-caps` runs everything.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output report.json
+    python benchmarks/run_benchmarks.py --detectors zscore_optimized ewma --sizes 1000 1000000
+    python benchmarks/run_benchmarks.py --compare baseline.json report.json --tolerance 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPORT_VERSION = 1
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+WARMUP_SIZE = 1000
+SEASONAL_PERIOD = 100
+
+
+def _zscore(data):
+    from detect_anomalies_zscore import detect_anomalies_zscore
+    return detect_anomalies_zscore(data)
+
+
+def _zscore_optimized(data):
+    from detect_anomalies_zscore import zscore_anomaly_detection_optimized
+    return zscore_anomaly_detection_optimized(data)
+
+
+def _ewma(data):
+    from detect_anomalies_emwa import detect_anomalies_ewma
+    return detect_anomalies_ewma(data)
+
+
+def _sh_esd(data):
+    from detect_anomalies_sh_esd import sh_esd
+    return sh_esd(data, SEASONAL_PERIOD)
+
+
+DETECTORS = {
+    'zscore': _zscore,
+    'zscore_optimized': _zscore_optimized,
+    'ewma': _ewma,
+    'sh_esd': _sh_esd,
+}
+
+# Generator name -> generate_data function name
+GENERATORS = {
+    'arima': 'generate_arima_data',
+    'brownian': 'generate_brownian_motion',
+    'garch': 'generate_garch_data',
+    'poisson': 'generate_poisson_process',
+    'random_walk': 'generate_random_walk',
+    'seasonal': 'generate_seasonal_data',
+}
+
+# Largest size each detector / generator runs at unless --no-caps is given
+DETECTOR_SIZE_CAPS = {
+    'zscore': 10 ** 5,
+    'zscore_optimized': 10 ** 6,
+}
+GENERATOR_SIZE_CAPS = {}
+
+
+def generate(generator, size, seed=0):
+    """
+    Seeded float64 series from a generate_data generator, with about one anomaly per
+    thousand points (at most 100) injected.
+    """
+    import generate_data
+
+    rng = np.random.default_rng(seed)
+    data = np.asarray(getattr(generate_data, GENERATORS[generator])(steps=size, rng=rng), dtype=np.float64)
+    num_anomalies = min(max(size // 1000, 1), 100)
+    return generate_data.add_anomalies(data, num_anomalies=num_anomalies, rng=rng)
+
+
+def run_case(detector, data, repeats=5, max_seconds=10.0):
+    """
+    Times `detector` on `data` and measures its peak traced memory.
+
+    The detector first runs untimed on the first WARMUP_SIZE values, so lazy imports are
+    not timed. It then runs up to `repeats` times, stopping early once `max_seconds` have
+    been spent (it always runs at least once), followed by one run under tracemalloc.
+
+    Returns:
+    - dict: Minimum, median and maximum latency, throughput, peak memory and the number
+      of anomalies found.
+    """
+    detector(data[:WARMUP_SIZE])
+
+    timings = []
+    spent = 0.0
+    while len(timings) < repeats and (not timings or spent < max_seconds):
+        start = time.perf_counter()
+        anomalies = detector(data)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+
+    tracemalloc.start()
+    try:
+        detector(data)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = np.asarray(timings)
+    latency = {
+        'min': float(timings.min()),
+        'median': float(np.median(timings)),
+        'max': float(timings.max()),
+    }
+    return {
+        'runs': len(timings),
+        'latency_seconds': latency,
+        'throughput': len(data) / latency['median'] if latency['median'] > 0 else float('inf'),
+        'peak_memory_bytes': int(peak_memory),
+        'anomalies': len(anomalies),
+    }
+
+
+def run_suite(detectors, generators, sizes, repeats=5, max_seconds=10.0, caps=True, seed=0, log=print):
+    """
+    Runs every (detector, generator, size) case and returns the list of case results.
+    Cases above a size cap are recorded with `"skipped": true`.
+    """
+    results = []
+    for generator in generators:
+        for size in sizes:
+            case_base = {'generator': generator, 'size': size}
+            data = None
+            if not caps or size <= GENERATOR_SIZE_CAPS.get(generator, size):
+                data = generate(generator, size, seed)
+            for detector in detectors:
+                case = dict(case_base, detector=detector)
+                if data is None or (caps and size > DETECTOR_SIZE_CAPS.get(detector, size)):
+                    results.append(dict(case, skipped=True))
+                    continue
+                case.update(run_case(DETECTORS[detector], data, repeats, max_seconds))
+                results.append(case)
+                log(f"{detector:<17} {generator:<11} {size:>9} "
+                    f"median {case['latency_seconds']['median']:>9.4f}s "
+                    f"{case['throughput']:>12.0f}/s {case['peak_memory_bytes'] / 2 ** 20:>8.1f} MiB")
+    return results
+
+
+def build_report(results, args):
+    return {
+        'version': REPORT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'settings': {
+            'repeats': args.repeats,
+            'max_seconds': args.max_seconds,
+            'caps': not args.no_caps,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+
+def compare_reports(old_report, new_report):
+    """
+    Diffs the median latency of the cases present in both reports.
+
+    Returns:
+    - list: (detector, generator, size, old median, new median, ratio) tuples for every
+      shared case.
+    """
+    def index(report):
+        return {(case['detector'], case['generator'], case['size']): case
+                for case in report['results'] if not case.get('skipped')}
+
+    old_cases, new_cases = index(old_report), index(new_report)
+    rows = []
+    for key in sorted(old_cases.keys() & new_cases.keys()):
+        old_median = old_cases[key]['latency_seconds']['median']
+        new_median = new_cases[key]['latency_seconds']['median']
+        rows.append(key + (old_median, new_median, new_median / old_median if old_median > 0 else float('inf')))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--detectors", nargs="+", choices=list(DETECTORS), default=list(DETECTORS))
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeats", type=int, default=5, help="Maximum timed runs per case.")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Stop repeating a case once this much time was spent on it.")
+    parser.add_argument("--no-caps", action="store_true", help="Ignore the per detector/generator size caps.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="Compare two reports instead of running the suite.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed relative slowdown of the median latency when comparing.")
+    parser.add_argument("--min-delta", type=float, default=0.001,
+                        help="Slowdowns smaller than this many seconds are timer noise and not flagged.")
+    args = parser.parse_args()
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path) as report_file:
+                reports.append(json.load(report_file))
+        rows = compare_reports(reports[0], reports[1])
+        slowdowns = 0
+        print(f"{'detector':<17} {'generator':<11} {'size':>9} {'old median':>10} {'new median':>10} {'ratio':>7}")
+        for detector, generator, size, old_median, new_median, ratio in rows:
+            flag = ""
+            if ratio > 1 + args.tolerance and new_median - old_median > args.min_delta:
+                flag = "  SLOWER"
+                slowdowns += 1
+            print(f"{detector:<17} {generator:<11} {size:>9} {old_median:>10.4f} {new_median:>10.4f} {ratio:>7.2f}{flag}")
+        print(f"{slowdowns} of {len(rows)} cases slowed down by more than {args.tolerance:.0%}")
+        return 1 if slowdowns else 0
+
+    results = run_suite(args.detectors, args.generators, args.sizes, args.repeats,
+                        args.max_seconds, not args.no_caps, args.seed)
+    with open(args.output, "w") as report_file:
+        json.dump(build_report(results, args), report_file, indent=2)
+        report_file.write("\n")
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Headless command-line entry point for batch and production runs.
+
+Reads a data file or generates synthetic data, runs one detector over it and writes the
+anomalies as CSV, JSON or the binary AnomalyResult format. matplotlib is only imported
+for --plot (rendered off-screen to an image file), pandas only for the S-H-ESD detectors,
+and statsmodels only for --decomposition statsmodels.
+
+Examples:
+    python cli.py --input sensor.txt --skip-header 1 --detector zscore --window-size 100
+    python cli.py --generate seasonal --steps 100000 --anomalies 50 --detector sh-esd --period 100
+    python cli.py --input metric.npy --detector sh-esd --period auto
+    python cli.py --input dump.npy --detector ewma-online --format binary --output anomalies.bin
+    python cli.py --input dump.npy --detector zscore --output anomalies.csv --plot incident.png
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+GENERATORS = ('arima', 'brownian', 'garch', 'poisson', 'random-walk', 'seasonal')
+DETECTORS = ('zscore', 'ewma', 'ewma-online', 'sh-esd', 'sh-esd-stream')
+# Detector ids used in binary output
+DETECTOR_NAMES = {
+    'zscore': 'zscore',
+    'ewma': 'ewma',
+    'ewma-online': 'ewma',
+    'sh-esd': 'sh_esd',
+    'sh-esd-stream': 'sh_esd',
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Run anomaly detection on a data file or generated data without any interaction.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', help="Data file: text (one number per line), .npy, .stream or raw float64.")
+    source.add_argument('--generate', choices=GENERATORS, help="Generate synthetic data instead of reading a file.")
+    parser.add_argument('--skip-header', type=int, default=0, help="Lines to skip at the start of a text file.")
+    parser.add_argument('--steps', type=int, default=1000, help="Number of generated data points.")
+    parser.add_argument('--anomalies', type=int, default=0, help="Number of anomalies to inject into generated data.")
+    parser.add_argument('--seed', type=int, help="Seed for the data generators.")
+
+    parser.add_argument('--detector', choices=DETECTORS, default='zscore')
+    parser.add_argument('--window-size', type=int, default=50, help="Z-score rolling window size.")
+    parser.add_argument('--threshold', type=float, default=3, help="Z-score / EWMA threshold in standard deviations.")
+    parser.add_argument('--alpha', type=float, default=0.3, help="EWMA smoothing factor.")
+    parser.add_argument('--period', type=_period, default=100,
+                        help="S-H-ESD seasonal period, or 'auto' to estimate it from the data.")
+    parser.add_argument('--max-anomalies', type=float, default=0.05, help="S-H-ESD maximum fraction of anomalies.")
+    parser.add_argument('--significance', type=float, default=0.05, help="S-H-ESD significance level.")
+    parser.add_argument('--decomposition', choices=('numpy', 'statsmodels'), default='numpy',
+                        help="S-H-ESD seasonal decomposition backend.")
+    parser.add_argument('--block-size', type=int, default=1 << 17, help="Values per block when streaming.")
+
+    parser.add_argument('--format', choices=('csv', 'json', 'binary'), default='csv')
+    parser.add_argument('--output', default='-', help="Output path, '-' for stdout (not for binary).")
+    parser.add_argument('--plot', help="Also save a static plot of the data and anomalies to this image file.")
+    return parser
+
+
+def iter_input_blocks(args):
+    """
+    Yields the input data as float64 blocks.
+    """
+    if args.input is not None:
+        from data_io import iter_file_blocks
+        yield from iter_file_blocks(args.input, block_size=args.block_size, skip_header=args.skip_header)
+        return
+
+    data_stream = generate(args)
+    for start in range(0, len(data_stream), args.block_size):
+        yield data_stream[start:start + args.block_size]
+
+
+def generate(args):
+    """
+    Generates the synthetic series selected with --generate.
+    """
+    import generate_data
+
+    generators = {
+        'arima': generate_data.generate_arima_data,
+        'brownian': generate_data.generate_brownian_motion,
+        'garch': generate_data.generate_garch_data,
+        'poisson': generate_data.generate_poisson_process,
+        'random-walk': generate_data.generate_random_walk,
+        'seasonal': generate_data.generate_seasonal_data,
+    }
+    rng = np.random.default_rng(args.seed)
+    data_stream = np.asarray(generators[args.generate](steps=args.steps, rng=rng), dtype=np.float64)
+    if args.anomalies:
+        data_stream = generate_data.add_anomalies(data_stream, num_anomalies=args.anomalies, rng=rng)
+    return data_stream
+
+
+def detect(args, blocks):
+    """
+    Runs the selected detector over the input blocks.
+
+    Returns:
+    - anomalies: list of tuples or AnomalyResult
+        Detected anomalies as (index, value) tuples.
+    """
+    if args.detector == 'zscore':
+        return _detect_zscore(blocks, args.window_size, args.threshold)
+    if args.detector == 'ewma-online':
+        from detect_anomalies_emwa import EWMADetector
+        return _run_streaming(EWMADetector(args.alpha, args.threshold), blocks)
+    if args.detector == 'sh-esd-stream':
+        from detect_anomalies_sh_esd import StreamingSHESD
+        if args.period == 'auto':
+            raise ValueError("--period auto needs the whole series; use --detector sh-esd.")
+        return _run_streaming(StreamingSHESD(args.period, alpha=args.significance), blocks)
+
+    # The remaining detectors need the whole series
+    blocks = list(blocks)
+    data_stream = np.concatenate(blocks) if blocks else np.empty(0)
+    if args.detector == 'ewma':
+        from detect_anomalies_emwa import detect_anomalies_ewma
+        return detect_anomalies_ewma(data_stream, args.alpha, args.threshold)
+    from detect_anomalies_sh_esd import sh_esd
+    return sh_esd(data_stream, args.period, args.max_anomalies, args.significance,
+                  backend=args.decomposition)
+
+
+def write_anomalies(anomalies, args):
+    """
+    Writes the anomalies in the selected output format.
+    """
+    if args.format == 'binary':
+        from anomaly_results import AnomalyResult
+        if args.output == '-':
+            raise ValueError("Binary output needs an --output path.")
+        if not isinstance(anomalies, AnomalyResult):
+            anomalies = AnomalyResult.from_tuples(anomalies, detector=DETECTOR_NAMES[args.detector])
+        anomalies.save(args.output)
+        return
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        if args.format == 'csv':
+            output.write("index,value\n")
+            output.writelines(f"{int(index)},{float(value)!r}\n" for index, value in anomalies)
+        else:
+            json.dump([{'index': int(index), 'value': float(value)} for index, value in anomalies], output)
+            output.write("\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def plot_anomalies(data_stream, anomalies, args):
+    """
+    Renders the data and the anomalies to the --plot image file without a display.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from visualize_data import visualize_anomalies_static
+
+    visualize_anomalies_static(data_stream, anomalies, args.detector, output_path=args.plot)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        blocks = iter_input_blocks(args)
+        if args.plot:
+            blocks = list(blocks)  # The plot needs the data after detection
+        anomalies = detect(args, iter(blocks))
+        write_anomalies(anomalies, args)
+        if args.plot:
+            plot_anomalies(np.concatenate(blocks) if blocks else np.empty(0), anomalies, args)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Error: {e}\n")
+    return 0
+
+
+def _period(value):
+    # --period argument type: a positive integer or 'auto'
+    if value == 'auto':
+        return value
+    try:
+        period = int(value)
+    except ValueError:
+        period = 0
+    if period < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer or 'auto', got {value!r}")
+    return period
+
+
+def _detect_zscore(blocks, window_size, threshold):
+    # Each block is scored with the last window_size values of the previous blocks as
+    # context, which gives exactly the anomalies of a run over the whole series
+    from detect_anomalies_zscore import detect_anomalies_zscore_batch
+
+    anomalies = []
+    context = np.empty(0)
+    offset = 0
+    for block in blocks:
+        segment = np.concatenate((context, block))
+        indices = detect_anomalies_zscore_batch(segment, window_size, threshold)
+        indices = indices[indices >= len(context)]
+        anomalies.extend(zip((indices + offset - len(context)).tolist(), segment[indices].tolist()))
+        offset += len(block)
+        context = segment[-window_size:]
+    return anomalies
+
+
+def _run_streaming(detector, blocks):
+    anomalies = []
+    for block in blocks:
+        anomalies.extend(detector.update_batch(block))
+    return anomalies
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import os
+import struct
+
+import numpy as np
+
+# File extensions read as raw little-endian float64 through np.memmap
+RAW_FLOAT_EXTENSIONS = ('.bin', '.raw', '.f64')
+
+# 24-byte header of the binary formats (.stream files here, AnomalyResult files in
+# anomaly_results); the magic tells them apart
+BINARY_HEADER = struct.Struct('<8sHHIQ')   # magic, version, reserved, reserved, count
+
+# Stream files: a BINARY_HEADER followed by little-endian float64 values
+STREAM_EXTENSION = '.stream'
+STREAM_MAGIC = b'ANOMSTR\x00'
+STREAM_VERSION = 1
+
+
+def iter_text_chunks(file_path, chunk_size=1 << 20, skip_header=0):
+    """
+    Streams a text file of whitespace-separated numbers as float64 blocks.
+
+    The file is read in fixed-size byte chunks; a line split across two chunks is carried
+    over to the next one, so peak memory depends on `chunk_size` and not on the file size.
+
+    Parameters:
+    - file_path: str
+        Path to a text file with one floating point number per line (see example.txt).
+    - chunk_size: int, optional (default=1 MiB)
+        Number of bytes read per block.
+    - skip_header: int, optional (default=0)
+        Number of lines to skip at the beginning of the file.
+
+    Yields:
+    - block: np.array of float64
+        The values parsed from the next chunk (never empty).
+    """
+    with open(file_path, 'rb') as file:
+        for _ in range(skip_header):
+            file.readline()
+        lines = LineBuffer()
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            block = lines.feed(chunk)
+            if len(block):
+                yield block
+        block = lines.flush()
+        if len(block):
+            yield block
+
+
+class LineBuffer:
+    """
+    Parses a byte stream of whitespace-separated numbers that arrives in arbitrary chunks.
+
+    Only complete lines are parsed; the partial last line of a chunk is carried over and
+    completed by the next one, so a number is never split between two blocks.
+    """
+
+    def __init__(self):
+        self._remainder = b''
+
+    def feed(self, chunk):
+        """
+        Adds the next chunk of bytes and returns the values of the lines it completes.
+        """
+        chunk = self._remainder + chunk
+        cut = chunk.rfind(b'\n') + 1
+        self._remainder = chunk[cut:]
+        return _parse_numbers(chunk[:cut])
+
+    def flush(self):
+        """
+        Returns the values of the carried-over partial line, at the end of the stream.
+        """
+        remainder, self._remainder = self._remainder, b''
+        return _parse_numbers(remainder)
+
+
+def open_binary_stream(file_path):
+    """
+    Memory-maps a binary stream file without reading it into memory.
+
+    Parameters:
+    - file_path: str
+        A .npy file (any 1-D numeric array), a .stream file written by `write_stream_file`
+        or a raw file of little-endian float64 values.
+
+    Returns:
+    - data_stream: np.memmap
+        Read-only, zero-copy view of the file contents.
+    """
+    extension = _file_extension(file_path)
+    if extension == '.npy':
+        data_stream = np.load(file_path, mmap_mode='r')
+    elif extension == STREAM_EXTENSION:
+        count = _read_stream_header(file_path)
+        if not count:
+            return np.empty(0)
+        data_stream = np.memmap(file_path, dtype='<f8', mode='r', offset=BINARY_HEADER.size, shape=(count,))
+    else:
+        data_stream = np.memmap(file_path, dtype='<f8', mode='r')
+    if data_stream.ndim != 1:
+        raise ValueError(f"Expected a 1-D time series, but the file contains an array of shape {data_stream.shape}.")
+    return data_stream
+
+
+def iter_file_blocks(file_path, block_size=1 << 17, skip_header=0):
+    """
+    Streams any supported data file as float64 blocks of at most `block_size` values.
+
+    Binary files (.npy and raw float64) are memory-mapped; text files are parsed chunk by chunk.
+
+    Parameters:
+    - file_path: str
+        Path to the data file.
+    - block_size: int, optional (default=131072)
+        Maximum number of values per block (binary files) or approximate block size (text files).
+    - skip_header: int, optional (default=0)
+        Number of lines to skip at the beginning of a text file.
+
+    Yields:
+    - block: np.array of float64
+    """
+    if is_binary_file(file_path):
+        data_stream = open_binary_stream(file_path)
+        for start in range(0, len(data_stream), block_size):
+            yield np.asarray(data_stream[start:start + block_size], dtype=np.float64)
+    else:
+        # Roughly 25 bytes per value in a text file like example.txt
+        yield from iter_text_chunks(file_path, chunk_size=25 * block_size, skip_header=skip_header)
+
+
+def load_data_file(file_path, skip_header=0):
+    """
+    Loads a whole data file for detectors that need the full series.
+
+    Binary files holding float64 values are returned as zero-copy, read-only memory maps;
+    other binary dtypes (e.g. a .npy file of integers or float32) are converted to an
+    in-memory float64 array. Text files are parsed in chunks, which avoids the intermediate
+    Python objects `np.genfromtxt` builds.
+
+    Parameters:
+    - file_path: str
+        Path to the data file.
+    - skip_header: int, optional (default=0)
+        Number of lines to skip at the beginning of a text file.
+
+    Returns:
+    - data_stream: np.array (or np.memmap) of float64
+    """
+    if is_binary_file(file_path):
+        data_stream = open_binary_stream(file_path)
+        if data_stream.dtype != np.float64:
+            data_stream = np.asarray(data_stream, dtype=np.float64)
+        return data_stream
+    blocks = list(iter_text_chunks(file_path, skip_header=skip_header))
+    return np.concatenate(blocks) if blocks else np.empty(0)
+
+
+def write_stream_file(file_path, blocks):
+    """
+    Writes a data stream to the compact binary .stream format.
+
+    Parameters:
+    - file_path: str
+        Destination path; should end in .stream so readers recognize the format.
+    - blocks: np.array or iterable of np.array
+        The whole stream, or consecutive blocks of it (e.g. from `iter_file_blocks`),
+        which are written one at a time.
+
+    Returns:
+    - count: int
+        Number of values written.
+    """
+    if isinstance(blocks, np.ndarray):
+        blocks = (blocks,)
+    count = 0
+    with open(file_path, 'wb') as file:
+        file.write(BINARY_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, 0, 0, 0))
+        for block in blocks:
+            block = np.asarray(block, dtype='<f8')
+            file.write(block.tobytes())
+            count += len(block)
+        # The count is only known at the end; patch it into the header
+        file.seek(0)
+        file.write(BINARY_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, 0, 0, count))
+    return count
+
+
+def is_binary_file(file_path):
+    """
+    Returns True for file types that are memory-mapped rather than parsed as text.
+    """
+    return _file_extension(file_path) in ('.npy', STREAM_EXTENSION) + RAW_FLOAT_EXTENSIONS
+
+
+def _file_extension(file_path):
+    # Lower-case extension, so DATA.NPY is read like data.npy
+    return os.path.splitext(file_path)[1].lower()
+
+
+def _read_stream_header(file_path):
+    with open(file_path, 'rb') as file:
+        header = file.read(BINARY_HEADER.size)
+    if len(header) < BINARY_HEADER.size:
+        raise ValueError(f"{file_path} is not a stream file.")
+    magic, version, _, _, count = BINARY_HEADER.unpack(header)
+    if magic != STREAM_MAGIC:
+        raise ValueError(f"{file_path} is not a stream file.")
+    if version != STREAM_VERSION:
+        raise ValueError(f"Unsupported stream file version {version}.")
+    return count
+
+
+def _parse_numbers(text):
+    return np.array(text.split(), dtype=np.float64)
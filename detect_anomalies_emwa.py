@@ -1,24 +1,53 @@
 import numpy as np
+from scipy.signal import lfilter
 
-def ewma(data_stream, alpha=0.3):
+import instrumentation
+from anomaly_results import AnomalyResult, anomaly_records, as_series_matrix
+
+
+def ewma(data_stream, alpha=0.3, initial_state=None, return_state=False):
     """
     Compute Exponentially Weighted Moving Average (EWMA).
+
+    The recursion s[t] = alpha * x[t] + (1 - alpha) * s[t - 1] is evaluated as a first-order
+    IIR filter in a single `scipy.signal.lfilter` call, using a float64 accumulator so integer
+    inputs are not truncated. Passing the returned state back in as `initial_state` continues
+    the recursion, so processing a series in chunks gives exactly the same output as one call.
+    A 2-D input is smoothed along its last axis, one series per row.
     
     Parameters:
     - data: list or array of values to smooth.
     - alpha: smoothing factor, determines the weight of recent observations (0 < alpha <= 1).
+    - initial_state: last smoothed value of the previous chunk, or None to start the
+      recursion at the first value of `data_stream`.
+    - return_state: if True, also return the state to pass to the next call.
     
     Returns:
     - smoothed_data: array of smoothed values.
+    - state: last smoothed value (only if `return_state` is True).
     """
-    smoothed_data = np.zeros_like(data_stream)
-    smoothed_data[0] = data_stream[0]  # Initialize the first value
-    
-    for t in range(1, len(data_stream)):
-        smoothed_data[t] = alpha * data_stream[t] + (1 - alpha) * smoothed_data[t - 1]
-    
+    data = np.asarray(data_stream, dtype=np.float64)
+    smoothed_data = np.empty_like(data)
+    state = initial_state
+
+    if data.shape[-1]:
+        with instrumentation.stage('ewma.smooth', data.size):
+            if state is None:
+                smoothed_data[..., 0] = data[..., 0]  # Initialize the first value
+                start = 1
+                state = data[..., 0]
+            else:
+                start = 0
+            zi = (1 - alpha) * np.asarray(state, dtype=np.float64)[..., np.newaxis]
+            smoothed_data[..., start:], _ = lfilter([alpha], [1.0, -(1 - alpha)], data[..., start:],
+                                                    axis=-1, zi=zi)
+            state = smoothed_data[..., -1][()]  # [()] turns the 0-d result of a 1-D input into a scalar
+
+    if return_state:
+        return smoothed_data, state
     return smoothed_data
 
+
 def detect_anomalies_ewma(data, alpha=0.3, threshold=3):
     """
     EWMA-based anomaly detection.
@@ -29,15 +58,194 @@ def detect_anomalies_ewma(data, alpha=0.3, threshold=3):
     - threshold: the number of standard deviations away from EWMA to flag as an anomaly.
     
     Returns:
-    - anomalies: list of (index, value) where anomalies are detected.
+    - anomalies: AnomalyResult that behaves like a list of (index, value) where anomalies are
+      detected; the score is the residual divided by the standard deviation of the residuals.
     """
+    data = np.asarray(data)
     smoothed_data = ewma(data, alpha)
-    residuals = np.abs(data - smoothed_data)
-    std_dev = np.std(residuals)  # Standard deviation of the residuals
-    
-    anomalies = []
-    for t in range(len(data)):
-        if residuals[t] > threshold * std_dev:
-            anomalies.append((t, data[t]))
-    
-    return anomalies
\ No newline at end of file
+    with instrumentation.stage('ewma.residuals', len(data)):
+        residuals = np.abs(data - smoothed_data)
+        std_dev = np.std(residuals)  # Standard deviation of the residuals
+
+    with instrumentation.stage('ewma.threshold', len(data)):
+        indices = np.flatnonzero(residuals > threshold * std_dev)
+        scores = residuals[indices] / std_dev if len(indices) else np.empty(0)
+
+    instrumentation.count('ewma.samples', len(data))
+    instrumentation.count('ewma.anomalies', len(indices))
+    return AnomalyResult(indices, data[indices], scores, detector='ewma')
+
+
+def detect_anomalies_ewma_multi(data, alpha=0.3, threshold=3):
+    """
+    EWMA-based anomaly detection over many series at once.
+
+    Every row is scored exactly like `detect_anomalies_ewma` would score it on its own, with
+    the smoothing and residual statistics computed for all rows together along axis 1.
+
+    Parameters:
+    - data: array of shape (num_series, length), one series per row.
+    - alpha: smoothing factor for EWMA.
+    - threshold: the number of standard deviations away from EWMA to flag as an anomaly.
+
+    Returns:
+    - anomalies: structured array with dtype anomaly_results.ANOMALY_DTYPE; the score is the
+      residual divided by the standard deviation of the residuals of its series.
+    """
+    data = as_series_matrix(data)
+    smoothed_data = ewma(data, alpha)
+    with instrumentation.stage('ewma.residuals', data.size):
+        residuals = np.abs(data - smoothed_data)
+        std_dev = np.std(residuals, axis=1, keepdims=True)
+    with instrumentation.stage('ewma.threshold', data.size):
+        rows, indices = np.nonzero(residuals > threshold * std_dev)
+        scores = residuals[rows, indices] / std_dev[rows, 0]
+    instrumentation.count('ewma.samples', data.size)
+    instrumentation.count('ewma.anomalies', len(rows))
+    return anomaly_records(rows, indices, data[rows, indices], scores)
+
+
+class EWMADetector:
+    """
+    Online EWMA anomaly detector with an exponentially weighted residual variance.
+
+    Each value is compared with the EWMA level of the values before it. The resulting
+    one-step-ahead residuals are tracked with an exponentially weighted mean and variance,
+    and a value is flagged when its residual deviates from that mean by more than
+    `threshold` standard deviations. Only the current state is kept, so memory is constant
+    and later values never change the thresholds used for earlier ones.
+
+    `update` processes one value at a time; `update_batch` evaluates the same recursions
+    with `scipy.signal.lfilter` and gives identical results for any chunking of the stream.
+
+    Parameters:
+    - alpha: smoothing factor of the EWMA level (0 < alpha <= 1).
+    - threshold: the number of standard deviations away from the expected residual to flag as an anomaly.
+    - beta: smoothing factor of the residual mean and variance (0 < beta < 1).
+    - warmup: number of residuals to observe before flagging. Defaults to ceil(2 / beta).
+    """
+
+    def __init__(self, alpha=0.3, threshold=3, beta=0.05, warmup=None):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1].")
+        if not 0 < beta < 1:
+            raise ValueError("beta must be in (0, 1).")
+        self.alpha = alpha
+        self.threshold = threshold
+        self.beta = beta
+        self.warmup = int(np.ceil(2 / beta)) if warmup is None else warmup
+        self.reset()
+
+    def reset(self):
+        """
+        Clears the detector state so it can be reused on a new stream.
+        """
+        self.level = None           # EWMA of the data, None until the first value
+        self.residual_mean = 0.0
+        self.residual_var = 0.0
+        self.residuals_seen = 0
+        self.samples_seen = 0
+
+    def update(self, value):
+        """
+        Scores a single value and then folds it into the state.
+
+        Parameters:
+        - value: the next value of the data stream.
+
+        Returns:
+        - anomaly: (index, value) if the value is an anomaly, otherwise None.
+        """
+        index = self.samples_seen
+        self.samples_seen += 1
+        x = float(value)
+        if self.level is None:
+            self.level = x
+            return None
+
+        alpha, beta = self.alpha, self.beta
+        residual = x - self.level
+        deviation = residual - self.residual_mean
+        std_dev = np.sqrt(self.residual_var)
+        is_anomaly = (self.residuals_seen >= self.warmup and std_dev > 0
+                      and abs(deviation) > self.threshold * std_dev)
+
+        # Same operation order as the lfilter recursions in update_batch
+        self.residual_var = beta * (1 - beta) * (deviation * deviation) + (1 - beta) * self.residual_var
+        self.residual_mean = beta * residual + (1 - beta) * self.residual_mean
+        self.level = alpha * x + (1 - alpha) * self.level
+        self.residuals_seen += 1
+
+        return (index, value) if is_anomaly else None
+
+    def update_batch(self, values):
+        """
+        Scores a block of consecutive values with vectorized recursions.
+
+        Parameters:
+        - values: list or array of the next values of the data stream.
+
+        Returns:
+        - anomalies: list of (index, value) where anomalies are detected.
+        """
+        values = np.asarray(values)
+        data = values.astype(np.float64)
+        first_index = self.samples_seen
+        self.samples_seen += len(data)
+        start = 0
+        if self.level is None and len(data):
+            # The first value of the stream only initializes the level
+            self.level = data[0]
+            start = 1
+        data = data[start:]
+        if not len(data):
+            return []
+
+        alpha, beta = self.alpha, self.beta
+        # Level before each value, then the residuals against it
+        levels, level = ewma(data, alpha, initial_state=self.level, return_state=True)
+        with instrumentation.stage('ewma.residuals', len(data)):
+            previous_levels = np.concatenate(([self.level], levels[:-1]))
+            residuals = data - previous_levels
+
+            means, _ = lfilter([beta], [1.0, -(1 - beta)], residuals, zi=[(1 - beta) * self.residual_mean])
+            previous_means = np.concatenate(([self.residual_mean], means[:-1]))
+            deviations = residuals - previous_means
+
+            variances, _ = lfilter([beta * (1 - beta)], [1.0, -(1 - beta)], deviations * deviations,
+                                   zi=[(1 - beta) * self.residual_var])
+            previous_stds = np.sqrt(np.concatenate(([self.residual_var], variances[:-1])))
+
+        with instrumentation.stage('ewma.threshold', len(data)):
+            scored = np.arange(self.residuals_seen, self.residuals_seen + len(data)) >= self.warmup
+            flagged = np.flatnonzero(scored & (previous_stds > 0)
+                                     & (np.abs(deviations) > self.threshold * previous_stds))
+        instrumentation.count('ewma.samples', start + len(data))
+        instrumentation.count('ewma.anomalies', len(flagged))
+
+        self.level = level
+        self.residual_mean = means[-1]
+        self.residual_var = variances[-1]
+        self.residuals_seen += len(data)
+
+        return [(first_index + start + int(t), values[start + t]) for t in flagged]
+
+
+def detect_anomalies_ewma_online(data, alpha=0.3, threshold=3, beta=0.05, warmup=None):
+    """
+    One-pass EWMA anomaly detection with an exponentially weighted residual variance.
+
+    Offline replay of `EWMADetector`: flags exactly the points the streaming detector
+    flags when fed the same series.
+
+    Parameters:
+    - data: list or array of values.
+    - alpha: smoothing factor for EWMA.
+    - threshold: the number of standard deviations away from the expected residual to flag as an anomaly.
+    - beta: smoothing factor of the residual mean and variance.
+    - warmup: number of residuals to observe before flagging.
+
+    Returns:
+    - anomalies: list of (index, value) where anomalies are detected.
+    """
+    return EWMADetector(alpha, threshold, beta, warmup).update_batch(data)
@@ -1,54 +1,357 @@
+import bisect
+import functools
+import operator
+import os
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
 from scipy import stats
-from statsmodels.tsa.seasonal import seasonal_decompose
 
-def sh_esd(data_stream, period, max_anomalies=0.05):
+import instrumentation
+from anomaly_results import AnomalyResult, anomaly_records, as_series_matrix
+from detect_anomalies_zscore import RollingMoments
+from seasonal_decomposition import decompose_additive, estimate_period
+
+# Directory where ESD critical-value tables are persisted as .npy files (None disables it)
+CRITICAL_VALUE_CACHE_DIR = os.environ.get("ESD_CRITICAL_VALUE_CACHE_DIR")
+
+# Seasonal decomposition implementations: the pure-NumPy one in seasonal_decomposition, or
+# statsmodels' seasonal_decompose (imported only when used)
+DECOMPOSITION_BACKENDS = ('numpy', 'statsmodels')
+
+# Series longer than this are decimated before their period is estimated
+AUTO_PERIOD_MAX_SAMPLES = 1 << 22
+
+# Number of series ids whose detected period is remembered (least recently used are dropped)
+PERIOD_CACHE_SIZE = 1024
+
+_period_cache = OrderedDict()
+_period_cache_lock = threading.Lock()
+
+
+def sh_esd(data_stream, period, max_anomalies=0.05, alpha=0.05, robust=False, backend='numpy',
+           series_id=None):
     """
     Seasonal Hybrid Extreme Studentized Deviate (S-H-ESD) anomaly detection.
+
+    The series is split into trend, seasonal and residual components by an additive
+    moving-average decomposition, and the ESD test runs on the residuals. Both backends
+    compute the same decomposition; the default NumPy one is faster and does not need
+    statsmodels.
     
     Parameters:
     - data_stream: np.array
         The continuous data stream to be analyzed for anomalies.
     
-    - period: int
+    - period: int or 'auto'
         The seasonal period of the data stream (e.g., 24 for daily data with hourly observations).
+        'auto' estimates it with `detect_period`.
     
     - max_anomalies: float, optional (default=0.05)
         The maximum percentage of data points that can be detected as anomalies.
 
+    - alpha: float, optional (default=0.05)
+        Significance level of the ESD test.
+
+    - robust: bool, optional (default=False)
+        Score residuals with the median and MAD instead of the mean and standard deviation.
+
+    - backend: str, optional (default='numpy')
+        Decomposition implementation, one of DECOMPOSITION_BACKENDS.
+
+    - series_id: hashable, optional (default=None)
+        Identifies the series for period='auto', so the period detected on the first scan
+        is reused by later scans of the same series.
+
     Returns:
-    - anomalies: list of tuples
-        A list of detected anomalies where each entry is a tuple (index, value) indicating the index 
-        of the anomaly in the data stream and the corresponding anomalous value.
+    - anomalies: AnomalyResult
+        The detected anomalies with their ESD test statistics. It behaves like a list of tuples
+        (index, residual) indicating the index of the anomaly in the data stream and its
+        residual. A pandas Series input with a non-integer index (e.g. timestamps) gets a
+        plain list of (label, residual) tuples instead.
     """
     # Convert data to a pandas Series
     data = pd.Series(data_stream)
+
+    period = _resolve_period(period, data.to_numpy(), series_id)
     
     # Check if we have enough observations for the decomposition
     if len(data) < 2 * period:
         raise ValueError(f"Not enough data for seasonal decomposition. "
                          f"Data length must be at least 2 * period ({2 * period}), but got {len(data)}.")
+    _check_backend(backend)
 
+    instrumentation.count('sh_esd.samples', len(data))
     try:
         # Decompose the data stream into seasonal, trend, and residual components
-        decomposition = seasonal_decompose(data, period=period, model='additive', extrapolate_trend='freq')
+        with instrumentation.stage('sh_esd.decompose', len(data)):
+            resid = _decompose_residuals(data.to_numpy(), period, backend)
     
         # Extract the residual component
-        residual = decomposition.resid.dropna()
+        residual = pd.Series(resid, index=data.index).dropna()
+        labels = residual.index
+        values = residual.to_numpy(dtype=np.float64)
 
         # Perform the ESD test on the residuals
-        anomalies = perform_esd_test(residual, max_anomalies)
+        positions, scores = _esd_test(values, max_anomalies, alpha, robust)
     
     except ValueError as e:
         raise ValueError(f"Error during seasonal decomposition: {e}")
 
-    return anomalies
+    positions = np.asarray(positions, dtype=np.int64)
+    if not pd.api.types.is_integer_dtype(labels):
+        return [(labels[position], values[position]) for position in positions]
+    return AnomalyResult(labels[positions], values[positions], scores, detector='sh_esd')
+
+
+def sh_esd_multi(data, period, max_anomalies=0.05, alpha=0.05, robust=False, backend='numpy'):
+    """
+    S-H-ESD anomaly detection over many series at once.
+
+    All rows with the same period are decomposed in a single vectorized call; the ESD test
+    then runs on each row's residuals, giving the same anomalies as `sh_esd` per row.
+
+    Parameters:
+    - data: np.array
+        Array of shape (num_series, length), one series per row.
+
+    - period: int or 'auto'
+        The seasonal period of the series. 'auto' estimates it for each row with
+        `detect_period`.
+
+    - max_anomalies: float, optional (default=0.05)
+        The maximum percentage of data points per series that can be detected as anomalies.
+
+    - alpha: float, optional (default=0.05)
+        Significance level of the ESD test.
+
+    - robust: bool, optional (default=False)
+        Score residuals with the median and MAD instead of the mean and standard deviation.
+
+    - backend: str, optional (default='numpy')
+        Decomposition implementation, one of DECOMPOSITION_BACKENDS.
+
+    Returns:
+    - anomalies: np.array with dtype anomaly_results.ANOMALY_DTYPE
+        One (series_id, index, residual, score) record per anomaly; the score is the ESD
+        test statistic.
+    """
+    data = as_series_matrix(data)
+    _check_backend(backend)
+
+    # Rows sharing a period are decomposed together
+    groups = {}
+    if isinstance(period, str):
+        for row, series in enumerate(data):
+            groups.setdefault(_resolve_period(period, series), []).append(row)
+    else:
+        groups[_resolve_period(period)] = list(range(len(data)))
+
+    for row_period in groups:
+        if data.shape[1] < 2 * row_period:
+            raise ValueError(f"Not enough data for seasonal decomposition. "
+                             f"Data length must be at least 2 * period ({2 * row_period}), but got {data.shape[1]}.")
+
+    instrumentation.count('sh_esd.samples', data.size)
+    series_ids, indices, values, scores = [], [], [], []
+    for row_period, rows in groups.items():
+        try:
+            with instrumentation.stage('sh_esd.decompose', len(rows) * data.shape[1]):
+                residuals = _decompose_residuals(data[rows], row_period, backend)
+        except ValueError as e:
+            raise ValueError(f"Error during seasonal decomposition: {e}")
+
+        for series_id, residual in zip(rows, residuals):
+            valid = np.flatnonzero(~np.isnan(residual))
+            positions, statistics = _esd_test(residual[valid], max_anomalies, alpha, robust)
+            positions = valid[np.asarray(positions, dtype=np.int64)]
+            series_ids.append(np.full(len(positions), series_id))
+            indices.append(positions)
+            values.append(residual[positions])
+            scores.append(statistics)
+
+    return anomaly_records(np.concatenate(series_ids), np.concatenate(indices),
+                           np.concatenate(values), np.concatenate(scores))
+
+
+def detect_period(data_stream, series_id=None):
+    """
+    Estimates the seasonal period of a series, remembering it per series id.
+
+    The period is the strongest peak of the FFT autocorrelation (see
+    `seasonal_decomposition.estimate_period`); series longer than AUTO_PERIOD_MAX_SAMPLES
+    are decimated first. Periods found for a `series_id` are kept in a bounded LRU cache of
+    PERIOD_CACHE_SIZE entries, so repeated scans of the same series skip the estimation.
 
+    Parameters:
+    - data_stream: np.array
+        The series.
+
+    - series_id: hashable, optional (default=None)
+        Cache key of the series; None always estimates.
+
+    Returns:
+    - period: int or None
+        The detected period, or None if the series shows no seasonality (not cached).
+    """
+    if series_id is not None:
+        with _period_cache_lock:
+            if series_id in _period_cache:
+                _period_cache.move_to_end(series_id)
+                return _period_cache[series_id]
+
+    data = np.asarray(data_stream, dtype=np.float64)
+    with instrumentation.stage('sh_esd.estimate_period', len(data)):
+        period = estimate_period(data, max_samples=AUTO_PERIOD_MAX_SAMPLES)
+
+    if series_id is not None and period is not None:
+        with _period_cache_lock:
+            _period_cache[series_id] = period
+            _period_cache.move_to_end(series_id)
+            while len(_period_cache) > PERIOD_CACHE_SIZE:
+                _period_cache.popitem(last=False)
+    return period
+
+
+def clear_period_cache(series_id=None):
+    """
+    Forget the detected period of one series, or of all series when series_id is None.
+    """
+    with _period_cache_lock:
+        if series_id is None:
+            _period_cache.clear()
+        else:
+            _period_cache.pop(series_id, None)
+
+
+def _resolve_period(period, data=None, series_id=None):
+    """
+    Validates an S-H-ESD period, estimating it from `data` when it is 'auto'.
+    """
+    if isinstance(period, str):
+        if period != 'auto':
+            raise ValueError(f"period must be a positive integer or 'auto', got {period!r}.")
+        period = detect_period(data, series_id)
+        if period is None:
+            raise ValueError("No seasonal period found in the data; pass the period explicitly.")
+        return period
+    try:
+        if isinstance(period, bool):
+            raise TypeError
+        period = operator.index(period)
+    except TypeError:
+        raise ValueError(f"period must be a positive integer or 'auto', got {period!r}.") from None
+    if period < 1:
+        raise ValueError(f"period must be a positive integer or 'auto', got {period!r}.")
+    return period
+
+
+def _check_backend(backend):
+    if backend not in DECOMPOSITION_BACKENDS:
+        raise ValueError(f"Unknown decomposition backend {backend!r}, expected one of {DECOMPOSITION_BACKENDS}.")
 
-def perform_esd_test(residuals, max_anomalies):
+
+def _decompose_residuals(data, period, backend):
+    """
+    Residuals of the additive decomposition of a series, or of each row of a 2-D array.
+    """
+    if backend == 'numpy':
+        return decompose_additive(data, period).resid
+
+    from statsmodels.tsa.seasonal import seasonal_decompose
+
+    # seasonal_decompose treats columns as series
+    decomposition = seasonal_decompose(np.asarray(data).T, period=period, model='additive',
+                                       extrapolate_trend='freq')
+    return np.asarray(decomposition.resid).T
+
+
+def esd_critical_values(n, max_outliers, alpha=0.05, cache_dir=None):
+    """
+    Look up the ESD critical values for all iterations of a test.
+
+    Tables are memoized per (n, max_outliers, alpha) in a bounded LRU cache, so running the
+    test on many windows of the same length computes the Student-t quantiles only once.
+    When a cache directory is configured, tables are also stored there as .npy files so
+    new processes can load them instead of recomputing.
+
+    Parameters:
+    - n: int
+        Number of residuals the test starts with.
+
+    - max_outliers: int
+        Number of iterations (upper bound on the number of anomalies).
+
+    - alpha: float, optional (default=0.05)
+        Significance level of the test.
+
+    - cache_dir: str, optional (default=None)
+        Directory for persisted tables. Defaults to CRITICAL_VALUE_CACHE_DIR.
+
+    Returns:
+    - critical_values: np.array (read-only)
+        critical_values[i] is the threshold for the i-th iteration, when n - i residuals remain.
+    """
+    if cache_dir is None:
+        cache_dir = CRITICAL_VALUE_CACHE_DIR
+    return _cached_critical_values(int(n), int(max_outliers), float(alpha), cache_dir)
+
+
+def clear_critical_value_cache():
+    """
+    Drop all in-memory ESD critical-value tables (persisted files are kept).
+    """
+    _cached_critical_values.cache_clear()
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_critical_values(n, max_outliers, alpha, cache_dir):
+    path = None
+    if cache_dir:
+        path = os.path.join(cache_dir, f"esd_critical_{n}_{max_outliers}_{alpha!r}.npy")
+        try:
+            critical_values = np.load(path)
+        except (OSError, ValueError):
+            critical_values = None
+        if critical_values is not None and len(critical_values) == max_outliers:
+            critical_values.setflags(write=False)
+            return critical_values
+
+    critical_values = _compute_critical_values(n, max_outliers, alpha)
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temporary file first so concurrent readers never see a partial table
+            temp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(temp_path, critical_values)
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # Persistence is best effort; the in-memory table is still valid
+    critical_values.setflags(write=False)
+    return critical_values
+
+
+def _compute_critical_values(n, max_outliers, alpha):
+    remaining = n - np.arange(max_outliers, dtype=np.float64)
+    lambda_values = stats.t.ppf(1 - alpha / (2 * remaining), df=remaining - 1)
+    return lambda_values * remaining / np.sqrt((remaining - 1 + lambda_values**2) * remaining)
+
+
+def perform_esd_test(residuals, max_anomalies, alpha=0.05, robust=False):
     """
     Perform the ESD (Extreme Studentized Deviate) test on residuals to detect anomalies.
+
+    The residuals are sorted once. The most extreme remaining residual is always at one of
+    the two ends of the sorted values, so each iteration only compares the two ends and
+    removes one of them from running sums, instead of recomputing the mean and standard
+    deviation over all remaining residuals.
+
+    With `robust=True` the residuals are scored against the median and the MAD (scaled to
+    be consistent with the standard deviation), as in Twitter's S-H-ESD. Both are order
+    statistics of the remaining sorted values, found with binary searches in O(log n)
+    per iteration, so the anomalies themselves do not inflate the spread estimate.
     
     Parameters:
     - residuals: pd.Series
@@ -57,34 +360,318 @@ def perform_esd_test(residuals, max_anomalies):
     - max_anomalies: float
         The maximum percentage of data points that can be detected as anomalies.
 
+    - alpha: float, optional (default=0.05)
+        Significance level of the test.
+
+    - robust: bool, optional (default=False)
+        Use the median and MAD instead of the mean and standard deviation.
+
     Returns:
     - anomalies: list of tuples
         Detected anomalies as (index, value) tuples.
     """
-    n = len(residuals)
+    if not isinstance(residuals, pd.Series):
+        residuals = pd.Series(residuals)
+    residuals = residuals.dropna()
+    labels = residuals.index
+    values = residuals.to_numpy(dtype=np.float64)
+
+    positions, _ = _esd_test(values, max_anomalies, alpha, robust)
+    return [(labels[position], values[position]) for position in positions]
+
+
+def _esd_test(values, max_anomalies, alpha, robust):
+    """
+    ESD test on a float64 array without missing values.
+
+    Returns the positions of the anomalies in detection order and their test statistics.
+    """
+    with instrumentation.stage('sh_esd.esd_test', len(values)):
+        positions, scores, iterations = _esd_iterations(values, max_anomalies, alpha, robust)
+    instrumentation.count('sh_esd.esd_iterations', iterations)
+    instrumentation.count('sh_esd.anomalies', len(positions))
+    return positions, scores
+
+
+def _esd_iterations(values, max_anomalies, alpha, robust):
+    # Body of _esd_test; also returns the number of iterations that computed a test statistic
+    n = len(values)
     max_outliers = int(n * max_anomalies)
-    
-    anomalies = []
+    if max_outliers < 1:
+        return [], [], 0
+    critical_values = esd_critical_values(n, max_outliers, alpha)
+
+    # Sort once (stable, so equal values stay in their original order) and center the
+    # values to keep the running sums well conditioned
+    order = np.argsort(values, kind='stable')
+    centered = values[order] - values.mean()
+    total = centered.sum()
+    total_sq = np.dot(centered, centered)
+
+    low, high = 0, n - 1
+    top_start = None  # Start of the run of equal values at the high end
+    top_taken = 0     # How many values of that run were already removed
+
+    positions, scores = [], []
+    iterations = 0
     for i in range(max_outliers):
-        mean = residuals.mean()
-        std_dev = residuals.std()
-        
-        # Calculate the modified Z-score for each residual
-        z_scores = np.abs((residuals - mean) / std_dev)
-        
-        # Find the data point with the maximum Z-score
-        max_z_score = z_scores.max()
-        max_index = z_scores.idxmax()
-        
-        # Compute the test statistic for ESD
-        lambda_value = stats.t.ppf(1 - 0.05 / (2 * (n - i)), df=n - i - 1)
-        critical_value = lambda_value * (n - i) / np.sqrt((n - i - 1 + lambda_value**2) * (n - i))
-        
+        count = high - low + 1
+        if count < 2:
+            break
+        if robust:
+            center, spread = _median_mad(centered, low, high)
+        else:
+            center = total / count
+            variance = (total_sq - total * center) / (count - 1)
+            spread = np.sqrt(variance) if variance > 0 else 0
+        if not spread > 0:
+            break
+        iterations += 1
+
+        low_deviation = center - centered[low]
+        high_deviation = centered[high] - center
+        if top_start is None:
+            top_start = high
+            while top_start > low and centered[top_start - 1] == centered[high]:
+                top_start -= 1
+            top_taken = 0
+        low_position = order[low]
+        high_position = order[top_start + top_taken]
+
+        # Ties go to the residual that comes first, like idxmax
+        take_high = (high_deviation > low_deviation or
+                     (high_deviation == low_deviation and high_position < low_position))
+        max_z_score = (high_deviation if take_high else low_deviation) / spread
+
         # Check if the maximum Z-score exceeds the critical value (flag as anomaly)
-        if max_z_score > critical_value:
-            anomalies.append((max_index, residuals[max_index]))
-            residuals = residuals.drop(max_index)  # Remove the outlier for next iteration
+        if max_z_score > critical_values[i]:
+            if take_high:
+                position = high_position
+                value = centered[high]
+                high -= 1
+                top_taken += 1
+                if top_start > high:
+                    top_start = None
+            else:
+                position = low_position
+                value = centered[low]
+                low += 1
+            total -= value
+            total_sq -= value * value
+            positions.append(position)
+            scores.append(max_z_score)
         else:
             break
-    
-    return anomalies
\ No newline at end of file
+
+    return positions, scores, iterations
+
+
+# Scale factor making the MAD a consistent estimator of the standard deviation
+MAD_SCALE = 1.4826
+
+
+def _median_mad(sorted_values, low, high):
+    """
+    Median and scaled MAD of sorted_values[low:high + 1] in O(log n).
+
+    The absolute deviations from the median form two sorted sequences: the values below the
+    median read backwards, and the values from the median on read forwards. The MAD is the
+    middle element of their merge, found with a binary search over the split between them.
+    """
+    count = high - low + 1
+    middle = low + count // 2
+    if count % 2:
+        median = sorted_values[middle]
+    else:
+        median = (sorted_values[middle - 1] + sorted_values[middle]) / 2
+    split = bisect.bisect_left(sorted_values, median, low, high + 1)
+    below = split - low
+    above = high + 1 - split
+
+    def kth_deviation(k):
+        # k-th smallest (0-based) absolute deviation: take i from below the split, k + 1 - i from above
+        first = max(0, k + 1 - above)
+        last = min(below, k + 1)
+        while first < last:
+            i = (first + last) // 2
+            if median - sorted_values[split - 1 - i] < sorted_values[split + k - i] - median:
+                first = i + 1
+            else:
+                last = i
+        i = first
+        j = k + 1 - i
+        deviation = -np.inf
+        if i:
+            deviation = median - sorted_values[split - i]
+        if j:
+            deviation = max(deviation, sorted_values[split + j - 1] - median)
+        return deviation
+
+    if count % 2:
+        mad = kth_deviation(count // 2)
+    else:
+        mad = (kth_deviation(count // 2 - 1) + kth_deviation(count // 2)) / 2
+    return median, MAD_SCALE * mad
+
+
+class StreamingSHESD:
+    """
+    Sliding-window S-H-ESD for live data streams.
+
+    Instead of re-decomposing the whole series on every new value, the decomposition is
+    kept up to date incrementally:
+    - trend: trailing moving average over the last `period` values (a full period, so the
+      seasonal pattern cancels out of it),
+    - seasonal: running mean of the detrended values for each phase of the period,
+      re-centered to zero mean across phases,
+    - residual: value minus trend and seasonal component.
+    Each new value's residual is tested against the mean and sample standard deviation
+    (ddof=1, as in the batch ESD test) of the last `window_size` non-anomalous residuals with
+    the single-outlier ESD critical value. Anomalies are kept out of that window, and are
+    winsorized before they update the trend and the seasonal profile: they are folded in
+    as if their residual sat on the detection threshold, so a spike does not shift the
+    residuals of the values after it. Every update costs amortized O(1).
+
+    Parameters:
+    - period: int
+        The seasonal period of the data stream.
+
+    - window_size: int, optional (default=None)
+        Number of recent residuals the test is run against. Defaults to max(10 * period, 100).
+
+    - alpha: float, optional (default=0.05)
+        Significance level of the ESD test.
+    """
+
+    def __init__(self, period, window_size=None, alpha=0.05):
+        if period < 1:
+            raise ValueError("period must be a positive integer.")
+        self.period = period
+        self.window_size = max(10 * period, 100) if window_size is None else window_size
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        """
+        Clears the decomposition and residual state.
+        """
+        self._trend = RollingMoments(self.period)
+        self._residuals = RollingMoments(self.window_size)
+        self._phase_means = np.zeros(self.period)
+        self._phase_counts = np.zeros(self.period, dtype=np.int64)
+        self._phase_total = 0.0     # Sum of the phase means, to re-center the seasonal profile
+        self._critical_value = None
+        self._critical_count = None
+        self.samples_seen = 0
+
+    def update(self, value):
+        """
+        Scores a single value and then folds it into the decomposition.
+
+        Parameters:
+        - value: float
+            The next value of the data stream.
+
+        Returns:
+        - anomaly: tuple or None
+            (index, residual) if the value is an anomaly, otherwise None.
+        """
+        index = self.samples_seen
+        self.samples_seen += 1
+        x = float(value)
+        trend = self._trend
+        if trend.count < self.period:
+            # Not a full period yet: nothing to detrend against
+            trend.push(x)
+            return None
+
+        phase = index % self.period
+        detrended = x - trend.mean
+        seasonal = 0.0
+        if self._phase_counts[phase]:
+            seasonal = self._phase_means[phase] - self._phase_total / self.period
+        residual = detrended - seasonal
+
+        is_anomaly = False
+        residuals = self._residuals
+        if index >= 2 * self.period and residuals.count >= 2 and residuals.m2 > 0:
+            std_dev = np.sqrt(residuals.m2 / (residuals.count - 1))
+            limit = self._critical(residuals.count) * std_dev
+            deviation = residual - residuals.mean
+            is_anomaly = abs(deviation) > limit
+            if is_anomaly:
+                # Winsorize: move the value onto the threshold before it updates the
+                # decomposition; the reported residual is the original one
+                adjustment = np.copysign(limit, deviation) - deviation
+                x += adjustment
+                detrended += adjustment
+
+        # Update the seasonal profile and the trend with the new value
+        count = self._phase_counts[phase] + 1
+        delta = (detrended - self._phase_means[phase]) / count
+        self._phase_means[phase] += delta
+        self._phase_counts[phase] = count
+        self._phase_total += delta
+        trend.push(x)
+
+        # Anomalies are kept out of the residual distribution they are tested against
+        if is_anomaly:
+            return (index, residual)
+        residuals.push(residual)
+        return None
+
+    def update_batch(self, values):
+        """
+        Scores a block of consecutive values.
+
+        Parameters:
+        - values: np.array or list
+            The next values of the data stream.
+
+        Returns:
+        - anomalies: list of tuples
+            Detected anomalies as (index, residual) tuples.
+        """
+        anomalies = []
+        with instrumentation.stage('sh_esd.update_batch', len(values)):
+            for value in values:
+                anomaly = self.update(value)
+                if anomaly is not None:
+                    anomalies.append(anomaly)
+        instrumentation.count('sh_esd.samples', len(values))
+        instrumentation.count('sh_esd.anomalies', len(anomalies))
+        return anomalies
+
+    def _critical(self, count):
+        # The window length is constant once full, so the lookup is cached here as well
+        if count != self._critical_count:
+            self._critical_value = esd_critical_values(count, 1, self.alpha)[0]
+            self._critical_count = count
+        return self._critical_value
+
+
+def sh_esd_streaming(data_stream, period, window_size=None, alpha=0.05):
+    """
+    Replays a finished series through `StreamingSHESD`.
+
+    Returns anomalies in the same (index, residual) format as `sh_esd`, so the streaming
+    mode can be evaluated against the batch output on historical data.
+
+    Parameters:
+    - data_stream: np.array
+        The data stream to be analyzed for anomalies.
+
+    - period: int
+        The seasonal period of the data stream.
+
+    - window_size: int, optional (default=None)
+        Number of recent residuals each value is tested against.
+
+    - alpha: float, optional (default=0.05)
+        Significance level of the ESD test.
+
+    Returns:
+    - anomalies: list of tuples
+        Detected anomalies as (index, residual) tuples.
+    """
+    return StreamingSHESD(period, window_size, alpha).update_batch(data_stream)
@@ -1,6 +1,16 @@
-import numpy as np
+import math
 from collections import deque
 
+import numpy as np
+
+import instrumentation
+from anomaly_results import AnomalyResult, anomaly_records, as_series_matrix
+
+# Relative distance from the threshold below which StreamingZScoreDetector re-scores a value
+# exactly, far above the rounding error the rolling moments accumulate between re-anchorings
+RESCORE_TOLERANCE = 1e-9
+
+
 def detect_anomalies_zscore(data_stream, window_size=50, threshold=3):
     """
     Detects anomalies in a data stream using Z-score-based analysis.
@@ -16,71 +26,453 @@ def detect_anomalies_zscore(data_stream, window_size=50, threshold=3):
         The number of standard deviations above or below the mean to consider as an anomaly.
 
     Returns:
-    - anomalies: list of tuples
-        A list of detected anomalies where each entry is a tuple (index, value) indicating the index 
-        of the anomaly in the data stream and the corresponding anomalous value.
+    - anomalies: AnomalyResult
+        The detected anomalies with their Z-scores. It behaves like a list of tuples (index, value)
+        indicating the index of the anomaly in the data stream and the corresponding anomalous value.
     """
     # Deque to store a rolling window of data points
     rolling_window = deque(maxlen=window_size)
     
-    # List to store detected anomalies
-    anomalies = []
+    # Indices, values and Z-scores of the detected anomalies
+    indices, values, scores = [], [], []
+
+    i = -1
+    with instrumentation.stage('zscore.detect'):
+        for i, value in enumerate(data_stream):
+            # Only calculate Z-score when the rolling window is full
+            if len(rolling_window) == window_size:
+                mean = np.mean(rolling_window)   # Compute mean of the rolling window
+                std_dev = np.std(rolling_window) # Compute standard deviation of the rolling window
 
-    for i, value in enumerate(data_stream):
-        # Only calculate Z-score when the rolling window is full
-        if len(rolling_window) == window_size:
-            mean = np.mean(rolling_window)   # Compute mean of the rolling window
-            std_dev = np.std(rolling_window) # Compute standard deviation of the rolling window
+                # Calculate the Z-score for the current data point
+                z_score = (value - mean) / std_dev if std_dev != 0 else 0
 
-            # Calculate the Z-score for the current data point
-            z_score = (value - mean) / std_dev if std_dev != 0 else 0
+                # If the Z-score exceeds the threshold, mark it as an anomaly
+                if abs(z_score) > threshold:
+                    # Store the index and value of the anomaly
+                    indices.append(i)
+                    values.append(value)
+                    scores.append(z_score)
 
-            # If the Z-score exceeds the threshold, mark it as an anomaly
-            if abs(z_score) > threshold:
-                anomalies.append((i, value))  # Store the index and value of the anomaly
-        
-        # Add the current value to the rolling window
-        rolling_window.append(value)
+            # Add the current value to the rolling window
+            rolling_window.append(value)
+
+    instrumentation.count('zscore.samples', i + 1)
+    instrumentation.count('zscore.anomalies', len(indices))
+    return AnomalyResult(indices, values, scores, detector='zscore')
 
-    return anomalies
 
-def zscore_anomaly_detection_optimized(data_stream, window_size=50, threshold=3):
+def zscore_anomaly_detection_optimized(data_stream, window_size=50, threshold=3, reanchor_interval=None):
     """
     Optimized Z-score-based anomaly detection using online calculations.
+
+    The rolling mean and variance are maintained by `RollingMoments`, which uses
+    Welford-style updates and periodic exact re-anchoring instead of raw sums of
+    squares, so long streams with large offsets do not drift into zero or
+    negative variances. Each sample costs amortized O(1).
+
+    Parameters:
+    - data_stream: np.array
+        The continuous data stream to be analyzed for anomalies.
+
+    - window_size: int, optional (default=50)
+        The size of the rolling window used for calculating the moving mean and standard deviation.
+
+    - threshold: float, optional (default=3)
+        The number of standard deviations above or below the mean to consider as an anomaly.
+
+    - reanchor_interval: int, optional (default=None)
+        Number of window slides between exact recomputations of the moments.
+        Defaults to `RollingMoments`' own default.
+
+    Returns:
+    - anomalies: AnomalyResult
+        The detected anomalies; behaves like a list of tuples (index, value).
     """
-    rolling_window = deque(maxlen=window_size)
-    anomalies = []
+    detector = StreamingZScoreDetector(window_size, threshold, reanchor_interval=reanchor_interval)
+    return AnomalyResult.from_tuples(detector.update_batch(data_stream), detector='zscore_optimized')
+
+
+def detect_anomalies_zscore_batch(data_stream, window_size=50, threshold=3, block_size=4096):
+    """
+    Vectorized Z-score anomaly detection for large historical arrays.
 
-    # Initialize rolling statistics
-    sum_vals = 0.0
-    sum_sq_vals = 0.0
+    Flags exactly the same points as `detect_anomalies_zscore`: each value is scored against
+    the mean and population standard deviation of the `window_size` values before it, and
+    the Z-score is 0 when that standard deviation is 0. Windows holding a NaN or infinity
+    give a NaN Z-score and flag nothing, as in `detect_anomalies_zscore`.
 
-    for i, value in enumerate(data_stream):
-        if len(rolling_window) == window_size:
-            # Compute mean and std_dev using rolling sums
-            mean = sum_vals / window_size
-            variance = (sum_sq_vals / window_size) - (mean ** 2)
-            std_dev = np.sqrt(variance) if variance > 0 else 0
+    Rolling sums are computed with cumulative sums over blocks of the (block-centered) data.
+    Values whose decision could be flipped by the rounding error of the cumulative sums are
+    re-scored with the exact per-window computation, so the result does not depend on it.
 
-            z_score = (value - mean) / std_dev if std_dev != 0 else 0
+    Parameters:
+    - data_stream: np.array
+        The data stream to be analyzed for anomalies.
+
+    - window_size: int, optional (default=50)
+        The size of the rolling window used for calculating the moving mean and standard deviation.
+
+    - threshold: float, optional (default=3)
+        The number of standard deviations above or below the mean to consider as an anomaly.
+
+    - block_size: int, optional (default=4096)
+        Number of points scored per block. Smaller blocks keep the cumulative sums short and
+        accurate; larger blocks reduce per-block overhead.
 
-            if abs(z_score) > threshold:
-                anomalies.append((i, value))
+    Returns:
+    - anomaly_indices: np.array of int64
+        Indices of the detected anomalies in increasing order.
+    """
+    data = np.asarray(data_stream, dtype=np.float64)
+    _, indices, _ = _rolling_zscore_anomalies(data[np.newaxis, :], window_size, threshold, block_size)
+    return indices
+
+
+def detect_anomalies_zscore_multi(data, window_size=50, threshold=3, block_size=4096):
+    """
+    Vectorized Z-score anomaly detection over many series at once.
+
+    Every row is scored exactly like `detect_anomalies_zscore` would score it on its own,
+    but all rows are processed together with array operations along axis 1.
+
+    Parameters:
+    - data: np.array
+        Array of shape (num_series, length), one series per row.
+
+    - window_size: int, optional (default=50)
+        The size of the rolling window used for calculating the moving mean and standard deviation.
+
+    - threshold: float, optional (default=3)
+        The number of standard deviations above or below the mean to consider as an anomaly.
+
+    - block_size: int, optional (default=4096)
+        Number of points per series scored per block.
+
+    Returns:
+    - anomalies: np.array with dtype anomaly_results.ANOMALY_DTYPE
+        One (series_id, index, value, score) record per anomaly; the score is the Z-score.
+    """
+    data = as_series_matrix(data)
+    rows, indices, z_scores = _rolling_zscore_anomalies(data, window_size, threshold, block_size)
+    return anomaly_records(rows, indices, data[rows, indices], z_scores)
 
-            # Remove the oldest value from sums
-            old_value = rolling_window.popleft()
-            sum_vals -= old_value
-            sum_sq_vals -= old_value ** 2
+
+def _rolling_zscore_anomalies(data, window_size, threshold, block_size):
+    """
+    Rolling Z-score anomalies of every row of a 2-D float64 array.
+
+    Returns the row, column and Z-score of each anomaly, ordered by column within each block.
+    """
+    if window_size < 1:
+        raise ValueError("window_size must be a positive integer.")
+    n = data.shape[1]
+    eps = np.finfo(np.float64).eps
+
+    found_rows, found_columns, found_scores = [], [], []
+    for start in range(window_size, n, block_size):
+        stop = min(start + block_size, n)
+        segment = data[:, start - window_size:stop]
+        length = segment.shape[1]
+        samples = len(segment) * (stop - start)
+
+        # A NaN or infinity would spread through the cumulative sums of the whole block, so
+        # non-finite values are zeroed here and the windows holding them are handled below
+        finite = np.isfinite(segment)
+        all_finite = finite.all()
+        if not all_finite:
+            segment = np.where(finite, segment, 0.0)
+
+        with instrumentation.stage('zscore.window_stats', samples):
+            # Center each row of the block so the cumulative sums stay small
+            centered = segment - segment.mean(axis=1, keepdims=True)
+            zeros = np.zeros((len(segment), 1))
+            sums = np.concatenate((zeros, np.cumsum(centered, axis=1)), axis=1)
+            sums_sq = np.concatenate((zeros, np.cumsum(centered * centered, axis=1)), axis=1)
+            window_sum = sums[:, window_size:length] - sums[:, :length - window_size]
+            window_sum_sq = sums_sq[:, window_size:length] - sums_sq[:, :length - window_size]
+
+            mean = window_sum / window_size
+            variance = window_sum_sq / window_size - mean ** 2
+            std_dev = np.sqrt(np.maximum(variance, 0.0))
+
+        with instrumentation.stage('zscore.threshold', samples):
+            signed_deviation = centered[:, window_size:] - mean
+            deviation = np.abs(signed_deviation)
+            limit = threshold * std_dev
+
+            # Error bounds of the cumulative sums, plus the rounding of the per-window
+            # computation done by detect_anomalies_zscore on the raw values
+            abs_max = np.abs(segment).max(axis=1, keepdims=True)
+            mean_error = (2 * length * eps * np.abs(centered).sum(axis=1, keepdims=True)
+                          + 2 * window_size * eps * abs_max) / window_size
+            variance_error = (2 * length * eps * sums_sq[:, -1:] / window_size
+                              + 4 * window_size * eps * (window_sum_sq / window_size + mean ** 2)
+                              + (2 * np.abs(mean) + 2 * mean_error) * mean_error
+                              + (2 * window_size * eps * abs_max) ** 2)
+            safe_variance = np.where(variance > variance_error, variance, 1.0)
+            std_error = variance_error / np.sqrt(safe_variance)
+            tolerance = mean_error + threshold * std_error + 4 * eps * (deviation + limit + abs_max)
+
+            uncertain = (np.abs(deviation - limit) <= tolerance) | (variance <= variance_error)
+            flagged = (deviation > limit) & ~uncertain
+            if not all_finite:
+                # A window holding a non-finite value has a NaN standard deviation, so its
+                # Z-score is NaN and never flagged; a non-finite value scored against a finite
+                # window is re-scored exactly (infinities are flagged, NaNs are not)
+                nonfinite = np.concatenate((zeros, np.cumsum(~finite, axis=1)), axis=1)
+                window_nonfinite = nonfinite[:, window_size:length] > nonfinite[:, :length - window_size]
+                uncertain = (uncertain | ~finite[:, window_size:]) & ~window_nonfinite
+                flagged &= ~window_nonfinite
+            rows, columns = np.nonzero(flagged)
+            found_rows.append(rows)
+            found_columns.append(columns + start)
+            found_scores.append(signed_deviation[rows, columns] / std_dev[rows, columns])
+
+        # Re-score the uncertain points exactly as detect_anomalies_zscore does
+        uncertain_rows, uncertain_columns = np.nonzero(uncertain)
+        instrumentation.count('zscore.rescored', len(uncertain_rows))
+        with instrumentation.stage('zscore.rescore'):
+            for row, column in zip(uncertain_rows, uncertain_columns):
+                i = column + start
+                window = data[row, i - window_size:i]
+                window_mean = np.mean(window)
+                std_dev_exact = np.std(window)
+                z_score = (data[row, i] - window_mean) / std_dev_exact if std_dev_exact != 0 else 0
+                if abs(z_score) > threshold:
+                    found_rows.append(np.array([row]))
+                    found_columns.append(np.array([i]))
+                    found_scores.append(np.array([z_score]))
+
+    instrumentation.count('zscore.samples', data.size)
+    if not found_rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    rows = np.concatenate(found_rows).astype(np.int64)
+    columns = np.concatenate(found_columns).astype(np.int64)
+    scores = np.concatenate(found_scores)
+    instrumentation.count('zscore.anomalies', len(rows))
+    order = np.lexsort((columns, rows))
+    return rows[order], columns[order], scores[order]
+
+
+class RollingMoments:
+    """
+    Rolling mean and variance over a fixed-size window with O(1) updates.
+
+    Values live in a preallocated ring buffer. Sliding the window uses the Welford-style
+    update for replacing one value with another, which works on deviations from the mean
+    rather than on raw sums of squares and therefore does not suffer catastrophic
+    cancellation for data with a large offset. The small rounding error the updates still
+    accumulate is discarded every `reanchor_interval` slides by recomputing the moments
+    exactly from the buffer, which keeps the amortized cost per value O(1).
+
+    A NaN or infinity in the window makes the mean and variance NaN, as np.mean and np.std
+    of the window would. The number of such values in the window is tracked, and the
+    moments are recomputed from the buffer as soon as the last one leaves it.
+
+    Parameters:
+    - window_size: int
+        The number of most recent values the moments are computed over.
+
+    - reanchor_interval: int, optional (default=None)
+        Number of window slides between exact recomputations. Defaults to
+        max(16 * window_size, 1024).
+    """
+
+    def __init__(self, window_size, reanchor_interval=None):
+        if window_size < 1:
+            raise ValueError("window_size must be a positive integer.")
+        if reanchor_interval is None:
+            reanchor_interval = max(16 * window_size, 1024)
+        if reanchor_interval < 1:
+            raise ValueError("reanchor_interval must be a positive integer.")
+        self.window_size = window_size
+        self.reanchor_interval = reanchor_interval
+        self.reset()
+
+    def reset(self):
+        """
+        Empties the window.
+        """
+        self.buffer = np.zeros(self.window_size, dtype=np.float64)
+        self.head = 0       # Slot holding the oldest value once the window is full
+        self.count = 0      # Number of values currently in the window
+        self.mean = 0.0
+        self.m2 = 0.0       # Sum of squared deviations from the mean
+        self.nonfinite = 0  # Number of NaN / infinite values in the window
+        self._run = 0       # Length of the trailing run of identical values
+        self._last = None
+        self._slides = 0    # Slides since the last re-anchoring
+
+    @property
+    def variance(self):
+        """
+        Population variance of the values in the window.
+        """
+        if self.count == 0 or self.m2 <= 0:
+            return 0.0
+        return self.m2 / self.count
+
+    @property
+    def std(self):
+        """
+        Population standard deviation of the values in the window.
+        """
+        return np.sqrt(self.variance)
+
+    def push(self, value):
+        """
+        Adds a value to the window, evicting the oldest value once the window is full.
+
+        Parameters:
+        - value: float
+            The value to add.
+        """
+        x = float(value)
+        if not math.isfinite(x):
+            self.nonfinite += 1
+        window_size = self.window_size
+        if self.count == window_size:
+            # Slide the window: replace the oldest value with the new one
+            old = self.buffer[self.head]
+            delta = x - old
+            new_mean = self.mean + delta / window_size
+            self.m2 += delta * ((x - new_mean) + (old - self.mean))
+            self.mean = new_mean
+            self.buffer[self.head] = x
+            self.head = (self.head + 1) % window_size
+            self._slides += 1
+            if self.nonfinite and not math.isfinite(old):
+                self.nonfinite -= 1
+                if not self.nonfinite:
+                    self.reanchor()  # The NaN left in the moments by the evicted value goes too
+            if self._slides >= self.reanchor_interval:
+                self.reanchor()
         else:
-            # If window isn't full yet, just append
-            rolling_window.append(value)
-            sum_vals += value
-            sum_sq_vals += value ** 2
-            continue
+            # Window still filling: regular Welford accumulation
+            self.buffer[self.count] = x
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+
+        # A window of identical values has exactly zero spread; snap the moments
+        # so rounding left over from earlier values cannot produce a tiny std
+        self._run = self._run + 1 if x == self._last else 1
+        self._last = x
+        if self._run >= self.count and not self.nonfinite:
+            self.mean = x
+            self.m2 = 0.0
+
+    def reanchor(self):
+        """
+        Recomputes the mean and sum of squared deviations exactly from the buffer.
+        """
+        window = self.buffer[:self.count]
+        if self.count:
+            self.mean = float(np.mean(window))
+            self.m2 = float(np.sum((window - self.mean) ** 2))
+        self._slides = 0
+
+
+class StreamingZScoreDetector:
+    """
+    Stateful Z-score anomaly detector for live data streams.
+
+    Keeps the last `window_size` values in a `RollingMoments` ring buffer, so each new
+    sample costs O(1) regardless of the window size. Values whose Z-score is within
+    RESCORE_TOLERANCE of the threshold (such as the exact ties common in integer data), or
+    whose window has almost no spread, are re-scored with the exact per-window mean and
+    standard deviation in O(window_size). Feeding a float64 or integer series through
+    `update` / `update_batch` in any number of calls therefore flags the same points as
+    `detect_anomalies_zscore` on the whole series, NaNs and infinities included.
+
+    Parameters:
+    - window_size: int, optional (default=50)
+        The size of the rolling window used for calculating the moving mean and standard deviation.
+
+    - threshold: float, optional (default=3)
+        The number of standard deviations above or below the mean to consider as an anomaly.
+
+    - reanchor_interval: int, optional (default=None)
+        Number of window slides between exact recomputations of the moments.
+    """
+
+    def __init__(self, window_size=50, threshold=3, reanchor_interval=None):
+        self.window_size = window_size
+        self.threshold = threshold
+        self.moments = RollingMoments(window_size, reanchor_interval)
+        self.samples_seen = 0
+
+    def reset(self):
+        """
+        Clears the rolling window so the detector can be reused on a new stream.
+        """
+        self.moments.reset()
+        self.samples_seen = 0
+
+    def update(self, value):
+        """
+        Scores a single value against the current window and then adds it to the window.
+
+        Parameters:
+        - value: float
+            The next value of the data stream.
+
+        Returns:
+        - anomaly: tuple or None
+            (index, value) if the value is an anomaly, otherwise None. The index counts
+            every sample passed to this detector since creation or the last reset.
+        """
+        anomalies = self.update_batch((value,))
+        return anomalies[0] if anomalies else None
+
+    def update_batch(self, values):
+        """
+        Scores a block of consecutive values, updating the window after each one.
+
+        Parameters:
+        - values: iterable
+            The next values of the data stream, e.g. an np.array, a list or a generator.
+
+        Returns:
+        - anomalies: list of tuples
+            A list of detected anomalies where each entry is a tuple (index, value).
+        """
+        window_size = self.window_size
+        threshold = self.threshold
+        moments = self.moments
+        index = self.samples_seen
+
+        anomalies = []
+        with instrumentation.stage('zscore.update_batch') as timer:
+            for value in values:
+                if moments.count == window_size:
+                    mean = moments.mean
+                    std_dev = moments.std
+                    deviation = abs(value - mean)
+                    limit = threshold * std_dev
+                    tolerance = RESCORE_TOLERANCE * (deviation + limit + abs(mean))
+                    if abs(deviation - limit) <= tolerance or std_dev <= tolerance:
+                        # Rounding in the rolling moments could flip this decision
+                        is_anomaly = abs(self._exact_z_score(value)) > threshold
+                    else:
+                        is_anomaly = deviation > limit
+                    if is_anomaly:
+                        anomalies.append((index, value))
+                moments.push(value)
+                index += 1
+            timer.samples = index - self.samples_seen
 
-        # Add the new value to rolling window and sums
-        rolling_window.append(value)
-        sum_vals += value
-        sum_sq_vals += value ** 2
+        instrumentation.count('zscore.samples', index - self.samples_seen)
+        instrumentation.count('zscore.anomalies', len(anomalies))
+        self.samples_seen = index
+        return anomalies
 
-    return anomalies
\ No newline at end of file
+    def _exact_z_score(self, value):
+        # Z-score computed as detect_anomalies_zscore does, on the window in stream order
+        moments = self.moments
+        window = np.concatenate((moments.buffer[moments.head:], moments.buffer[:moments.head]))
+        mean = np.mean(window)
+        std_dev = np.std(window)
+        return (value - mean) / std_dev if std_dev != 0 else 0
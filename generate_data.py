@@ -1,11 +1,20 @@
+import time
+
 import numpy as np
-from arch import arch_model
-import statsmodels.api as sm
 
-def generate_arima_data(order=(1, 1, 1), steps=1000):
+# Number of samples simulated per chunk by the generators that need temporary arrays, so
+# memory stays close to the size of the output even for 1e8-point series
+CHUNK_SIZE = 1 << 20
+
+
+def generate_arima_data(order=(1, 1, 1), steps=1000, ar=None, ma=None, noise_std=1.0, rng=None):
     """
     Generates a synthetic time series using the ARIMA model.
-    
+
+    An ARMA(p, q) sample path is simulated by running Gaussian white noise through the
+    ARMA filter with `scipy.signal.lfilter` (carrying the filter state across chunks), and
+    is then integrated `d` times with cumulative sums. See `stream_arima_data`.
+
     Parameters:
     - order: tuple
         The (p, d, q) order of the ARIMA model.
@@ -14,25 +23,30 @@ def generate_arima_data(order=(1, 1, 1), steps=1000):
         q: number of moving average terms.
     - steps: int
         Number of time steps to generate.
-    
+    - ar: sequence of float, optional
+        The p autoregressive coefficients (x[t] = ar[0] * x[t-1] + ... + noise). Defaults
+        to 0.5 / p each, which keeps the process stationary.
+    - ma: sequence of float, optional
+        The q moving average coefficients. Defaults to 0.4 / q each.
+    - noise_std: float
+        Standard deviation of the white noise.
+    - rng: np.random.Generator or int, optional
+        Random generator or seed; None draws fresh entropy.
+
     Returns:
     - arima_data: np.array
         Generated ARIMA time series data.
     """
-    # Generate random noise to simulate white noise
-    np.random.seed(0)
-    noise = np.random.normal(0, 1, steps)
-    
-    # Fit ARIMA model with given parameters
-    arima_model = sm.tsa.ArmaProcess.from_coeffs(order[0], order[2])
-    arima_data = arima_model.generate_sample(steps)
-    
+    blocks = stream_arima_data(_chunk_size(steps), order, ar, ma, noise_std, rng)
+    arima_data = _fill(steps, blocks)
+
     return arima_data
 
-def generate_brownian_motion(steps=1000, drift=0.001, volatility=0.05):
+
+def generate_brownian_motion(steps=1000, drift=0.001, volatility=0.05, rng=None):
     """
     Generates a Brownian motion time series with drift and volatility.
-    
+
     Parameters:
     - steps: int
         Number of time steps to generate.
@@ -40,68 +54,114 @@ def generate_brownian_motion(steps=1000, drift=0.001, volatility=0.05):
         The expected drift per step.
     - volatility: float
         The standard deviation of random noise (volatility).
-    
+    - rng: np.random.Generator or int, optional
+        Random generator or seed; None draws fresh entropy.
+
     Returns:
     - brownian_motion: np.array
         Generated Brownian motion time series.
     """
-    time = np.arange(steps)
-    # Simulate Brownian motion with drift
-    brownian_motion = np.cumsum(np.random.normal(drift, volatility, steps))
-    
+    rng = np.random.default_rng(rng)
+    # Simulate Brownian motion with drift, accumulating the increments in place
+    brownian_motion = rng.normal(drift, volatility, steps)
+    np.cumsum(brownian_motion, out=brownian_motion)
+
     return brownian_motion
 
-def generate_garch_data(steps=1000):
+
+def generate_garch_data(steps=1000, omega=0.1, alpha=0.1, beta=0.85, rng=None):
     """
     Generates time series data using a GARCH(1, 1) model, often used to simulate financial time series.
-    
+
+    Simulates a sample path eps[t] = sigma[t] * z[t] with standard normal z and conditional
+    variance sigma2[t] = omega + alpha * eps[t-1] ** 2 + beta * sigma2[t-1], starting from
+    the unconditional variance. The variance recursion is linear in sigma2 with coefficients
+    alpha * z[t-1] ** 2 + beta, so it is solved without a per-sample Python loop (see
+    `stream_garch_data` and `_linear_recurrence`).
+
     Parameters:
     - steps: int
         Number of time steps to generate.
-    
+    - omega: float
+        Constant term of the variance equation (> 0).
+    - alpha: float
+        Weight of the last squared shock (>= 0).
+    - beta: float
+        Weight of the last variance (>= 0); alpha + beta must be below 1. With
+        alpha = beta = 0 the series is white noise with variance omega.
+    - rng: np.random.Generator or int, optional
+        Random generator or seed; None draws fresh entropy.
+
     Returns:
     - garch_data: np.array
         Generated GARCH time series data.
     """
-    # Generate random noise for the GARCH model
-    np.random.seed(0)
-    random_data = np.random.normal(0, 1, steps)
-    
-    # Fit a GARCH(1, 1) model to the random data
-    garch_model = arch_model(random_data, vol='Garch', p=1, q=1)
-    garch_fit = garch_model.fit(disp="off")
+    blocks = stream_garch_data(_chunk_size(steps), omega, alpha, beta, rng)
+    garch_data = _fill(steps, blocks)
 
-    # Forecast the next steps using the fitted model
-    forecast = garch_fit.forecast(horizon=steps)
+    return garch_data
 
-    # Get the conditional volatility (sigma) from the forecast
-    garch_data = forecast.variance.values[-1]
 
-    return garch_data
+def _linear_recurrence(coefficients, constant, initial, block_size=4096):
+    """
+    Solves s[t] = constant + coefficients[t] * s[t - 1] for all t, with s[-1] = initial.
 
+    Dividing by the running product P[t] of the coefficients gives
+    s[t] = P[t] * (initial + constant * sum(1 / P[j] for j <= t)), which is evaluated per
+    block in log space (cumsum of log coefficients, logaddexp.accumulate) so it neither
+    overflows nor underflows. Only the value carried from one block to the next needs a
+    Python loop, once per `block_size` samples. Coefficients must be non-negative; zero
+    coefficients (e.g. GARCH with alpha = beta = 0, or a zero shock with beta = 0) are
+    raised to the smallest normal float, whose contribution constant + tiny * s[t - 1]
+    rounds to the exact value `constant`, so the logarithm stays finite.
 
-def generate_poisson_process(lam=5, steps=1000):
+    Returns:
+    - s: np.array
+        The len(coefficients) values s[0], s[1], ...
+    """
+    n = len(coefficients)
+    padding = (-n) % block_size
+    coefficients = np.maximum(coefficients, np.finfo(np.float64).tiny)
+    log_coefficients = np.log(np.concatenate((coefficients, np.ones(padding)))).reshape(-1, block_size)
+    log_products = np.cumsum(log_coefficients, axis=1)
+    growth = np.exp(log_products)
+    offsets = constant * np.exp(log_products + np.logaddexp.accumulate(-log_products, axis=1))
+
+    block_starts = np.empty(len(growth))
+    value = initial
+    for block in range(len(growth)):
+        block_starts[block] = value
+        value = growth[block, -1] * value + offsets[block, -1]
+
+    return (growth * block_starts[:, np.newaxis] + offsets).ravel()[:n]
+
+
+def generate_poisson_process(lam=5, steps=1000, rng=None):
     """
     Generates a time series representing a Poisson process (e.g., transaction counts).
-    
+
     Parameters:
     - lam: float
         The rate or expected number of events per time unit (lambda).
     - steps: int
         Number of time steps to generate.
-    
+    - rng: np.random.Generator or int, optional
+        Random generator or seed; None draws fresh entropy.
+
     Returns:
     - poisson_data: np.array
         Generated Poisson process data.
     """
-    poisson_data = np.random.poisson(lam, steps)
-    
+    rng = np.random.default_rng(rng)
+    poisson_data = rng.poisson(lam, steps)
+
     return poisson_data
 
-def generate_random_walk(steps=1000, drift=0.0, volatility=1.0):
+
+def generate_random_walk(steps=1000, drift=0.0, volatility=1.0, rng=None):
     """
     Generates a random walk time series with optional drift and volatility.
-    
+
     Parameters:
     - steps: int
         Number of time steps to generate.
@@ -109,21 +169,27 @@ def generate_random_walk(steps=1000, drift=0.0, volatility=1.0):
         The expected drift per step (representing a steady trend in the data).
     - volatility: float
         The randomness or noise added to each step.
+    - rng: np.random.Generator or int, optional
+        Random generator or seed; None draws fresh entropy.
 
     Returns:
     - random_walk: np.array
         Generated random walk time series.
     """
+    rng = np.random.default_rng(rng)
     # Generate random steps
-    random_steps = np.random.normal(drift, volatility, steps)
-    
-    # Calculate cumulative sum to generate the random walk
-    random_walk = np.cumsum(random_steps)
+    random_walk = rng.normal(drift, volatility, steps)
 
-def generate_seasonal_data(steps=1000, seasonality_period=100, noise_std=1.0):
+    # Calculate cumulative sum (in place) to generate the random walk
+    np.cumsum(random_walk, out=random_walk)
+
+    return random_walk
+
+
+def generate_seasonal_data(steps=1000, seasonality_period=100, noise_std=1.0, amplitude=10.0, rng=None):
     """
     Generates a seasonal time series with random noise.
-    
+
     Parameters:
     - steps: int
         Number of time steps to generate.
@@ -131,22 +197,228 @@ def generate_seasonal_data(steps=1000, seasonality_period=100, noise_std=1.0):
         The period of the seasonality (e.g., daily cycle).
     - noise_std: float
         The standard deviation of the added noise.
-    
+    - amplitude: float
+        Amplitude of the sine wave.
+    - rng: np.random.Generator or int, optional
+        Random generator or seed; None draws fresh entropy.
+
     Returns:
     - seasonal_data: np.array
         Generated seasonal time series with noise.
     """
-    time = np.arange(steps)
-    seasonal_signal = 10 * np.sin(2 * np.pi * time / seasonality_period)
-    noise = np.random.normal(0, noise_std, steps)
-    
-    seasonal_data = seasonal_signal + noise
+    blocks = stream_seasonal_data(_chunk_size(steps), seasonality_period, noise_std, amplitude, rng)
+    seasonal_data = _fill(steps, blocks)
+
     return seasonal_data
 
-def add_anomalies(data, num_anomalies=5, anomaly_factor=5):
+
+# Infinite block generators for soak tests of live detectors. Each one yields float64
+# blocks of `block_size` values forever and carries the model state from one block to the
+# next, so the concatenated blocks are one continuous series and memory stays constant.
+# The stream_* functions check their parameters when called and return the generator, so
+# invalid parameters raise at the call site rather than at the first next().
+
+def stream_arima_data(block_size=1000, order=(1, 1, 1), ar=None, ma=None, noise_std=1.0, rng=None):
+    """
+    Yields an endless ARIMA series in blocks, carrying the ARMA filter state and the levels
+    of the `d` integrations between blocks. Parameters as in `generate_arima_data`.
+    """
+    p, d, q = order
+    ar = np.full(p, 0.5 / max(p, 1)) if ar is None else np.asarray(ar, dtype=np.float64)
+    ma = np.full(q, 0.4 / max(q, 1)) if ma is None else np.asarray(ma, dtype=np.float64)
+    if len(ar) != p or len(ma) != q:
+        raise ValueError("The number of ar / ma coefficients must match the order.")
+    return _arima_blocks(block_size, d, ar, ma, noise_std, np.random.default_rng(rng))
+
+
+def _arima_blocks(block_size, d, ar, ma, noise_std, rng):
+    # scipy is slow to import, so it is only loaded by the generator that uses it
+    from scipy.signal import lfilter
+
+    numerator = np.concatenate(([1.0], ma))
+    denominator = np.concatenate(([1.0], -ar))
+    zi = np.zeros(max(len(ar), len(ma)))
+
+    # Discard a burn-in period so the series starts from the stationary distribution
+    burn_in = 10 * (len(ar) + len(ma)) + 100
+    _, zi = lfilter(numerator, denominator, rng.normal(0, noise_std, burn_in), zi=zi)
+
+    levels = np.zeros(d)  # Last value of each integration
+    while True:
+        block, zi = lfilter(numerator, denominator, rng.normal(0, noise_std, block_size), zi=zi)
+        for k in range(d):
+            np.cumsum(block, out=block)
+            block += levels[k]
+            levels[k] = block[-1]
+        yield block
+
+
+def stream_brownian_motion(block_size=1000, drift=0.001, volatility=0.05, rng=None):
+    """
+    Yields an endless Brownian motion in blocks. Parameters as in `generate_brownian_motion`.
+    """
+    return stream_random_walk(block_size, drift, volatility, rng)
+
+
+def stream_garch_data(block_size=1000, omega=0.1, alpha=0.1, beta=0.85, rng=None):
+    """
+    Yields an endless GARCH(1, 1) sample path in blocks, carrying the conditional variance
+    between blocks. Parameters as in `generate_garch_data`.
+    """
+    if omega <= 0 or alpha < 0 or beta < 0 or alpha + beta >= 1:
+        raise ValueError("GARCH(1, 1) needs omega > 0, alpha >= 0, beta >= 0 and alpha + beta < 1.")
+    return _garch_blocks(block_size, omega, alpha, beta, np.random.default_rng(rng))
+
+
+def _garch_blocks(block_size, omega, alpha, beta, rng):
+    variance = omega / (1 - alpha - beta)  # Variance of the next sample
+    while True:
+        block = rng.standard_normal(block_size)
+        variances = _linear_recurrence(alpha * block * block + beta, omega, variance)
+        block[1:] *= np.sqrt(variances[:-1])
+        block[0] *= np.sqrt(variance)
+        variance = variances[-1]
+        yield block
+
+
+def stream_poisson_process(block_size=1000, lam=5, rng=None):
+    """
+    Yields endless Poisson counts in blocks. Parameters as in `generate_poisson_process`.
+    """
+    if lam < 0:
+        raise ValueError("lam must be non-negative.")
+    return _poisson_blocks(block_size, lam, np.random.default_rng(rng))
+
+
+def _poisson_blocks(block_size, lam, rng):
+    while True:
+        yield rng.poisson(lam, block_size).astype(np.float64)
+
+
+def stream_random_walk(block_size=1000, drift=0.0, volatility=1.0, rng=None):
+    """
+    Yields an endless random walk in blocks, carrying the current level between blocks.
+    Parameters as in `generate_random_walk`.
+    """
+    if volatility < 0:
+        raise ValueError("volatility must be non-negative.")
+    return _random_walk_blocks(block_size, drift, volatility, np.random.default_rng(rng))
+
+
+def _random_walk_blocks(block_size, drift, volatility, rng):
+    level = 0.0
+    while True:
+        block = rng.normal(drift, volatility, block_size)
+        np.cumsum(block, out=block)
+        block += level
+        level = block[-1]
+        yield block
+
+
+def stream_seasonal_data(block_size=1000, seasonality_period=100, noise_std=1.0, amplitude=10.0, rng=None):
+    """
+    Yields an endless seasonal series in blocks, carrying the phase of the season between
+    blocks. Parameters as in `generate_seasonal_data`.
+    """
+    if seasonality_period <= 0:
+        raise ValueError("seasonality_period must be positive.")
+    if noise_std < 0:
+        raise ValueError("noise_std must be non-negative.")
+    return _seasonal_blocks(block_size, seasonality_period, noise_std, amplitude, np.random.default_rng(rng))
+
+
+def _seasonal_blocks(block_size, seasonality_period, noise_std, amplitude, rng):
+    phase = 0  # Position within the season of the next value, kept small for precision
+    offsets = np.arange(block_size)
+    while True:
+        block = rng.normal(0, noise_std, block_size)
+        block += amplitude * np.sin(2 * np.pi * (phase + offsets) / seasonality_period)
+        phase = (phase + block_size) % seasonality_period
+        yield block
+
+
+class RateLimiter:
+    """
+    Release schedule for blocks of a stream emitted at `samples_per_second` values per
+    second, to simulate a production feed.
+
+    Each block is due when its first value is due on a schedule anchored at the first
+    block, so time spent by the consumer between blocks is absorbed rather than added to
+    the delay. `delay` only computes the wait, so the same schedule serves `rate_limited`
+    (time.sleep) and asyncio sources (asyncio.sleep).
+
+    Parameters:
+    - samples_per_second: float
+        Target rate (> 0).
+    - clock: callable, optional (default=time.monotonic)
+        Returns the current time in seconds.
+    """
+
+    def __init__(self, samples_per_second, clock=time.monotonic):
+        if not samples_per_second > 0:
+            raise ValueError("samples_per_second must be positive.")
+        self.samples_per_second = samples_per_second
+        self._clock = clock
+        self._start = None
+        self._emitted = 0
+
+    def delay(self, samples):
+        """
+        Seconds to wait before releasing the next block, which holds `samples` values.
+        """
+        now = self._clock()
+        if self._start is None:
+            self._start = now
+        delay = self._start + self._emitted / self.samples_per_second - now
+        self._emitted += samples
+        return max(delay, 0.0)
+
+
+def rate_limited(blocks, samples_per_second):
+    """
+    Yields the blocks of an iterator no faster than `samples_per_second` values per second,
+    on the schedule of a `RateLimiter`.
+
+    Parameters:
+    - blocks: iterator of np.array
+        E.g. one of the stream_* generators.
+    - samples_per_second: float
+        Target rate.
+
+    Returns:
+    - generator of np.array
+    """
+    return _rate_limited_blocks(blocks, RateLimiter(samples_per_second))
+
+
+def _rate_limited_blocks(blocks, limiter):
+    for block in blocks:
+        delay = limiter.delay(len(block))
+        if delay > 0:
+            time.sleep(delay)
+        yield block
+
+
+def _chunk_size(steps):
+    return max(1, min(steps, CHUNK_SIZE))
+
+
+def _fill(steps, blocks):
+    # First `steps` values of a block stream, written into one preallocated array
+    data = np.empty(steps)
+    for start in range(0, steps, CHUNK_SIZE):
+        block = next(blocks)
+        data[start:start + len(block)] = block[:steps - start]
+    return data
+
+
+def add_anomalies(data, num_anomalies=5, anomaly_factor=5, rng=None):
     """
     Adds anomalies to a time series by injecting random spikes or dips.
-    
+
+    The standard deviation of the data is computed once and all spikes are applied with a
+    single fancy-indexed assignment.
+
     Parameters:
     - data: np.array
         The original time series data.
@@ -154,19 +426,89 @@ def add_anomalies(data, num_anomalies=5, anomaly_factor=5):
         Number of anomalies to add.
     - anomaly_factor: float
         The factor by which to increase or decrease the value at anomaly points.
-    
+    - rng: np.random.Generator or int, optional
+        Random generator or seed; None draws fresh entropy.
+
     Returns:
     - data_with_anomalies: np.array
         Time series data with added anomalies.
     """
     if data is None:
         raise ValueError("Data cannot be None.")
+    rng = np.random.default_rng(rng)
     data_with_anomalies = data.copy()
-    anomaly_indices = np.random.choice(len(data), num_anomalies, replace=False)
-    
-    for idx in anomaly_indices:
-        # Randomly choose whether it's a spike or dip
-        anomaly_type = np.random.choice([1, -1])
-        data_with_anomalies[idx] += anomaly_type * anomaly_factor * np.std(data)
-    
+    anomaly_indices = rng.choice(len(data), num_anomalies, replace=False)
+
+    # Randomly choose whether each anomaly is a spike or a dip
+    anomaly_types = rng.choice([1, -1], num_anomalies)
+    # Plain assignment (not +=) so integer series are converted like single-element updates
+    data_with_anomalies[anomaly_indices] = (data_with_anomalies[anomaly_indices]
+                                            + anomaly_types * anomaly_factor * np.std(data))
+
     return data_with_anomalies
+
+
+def inject_anomalies(data, spikes=5, level_shifts=0, variance_bursts=0, collective=0,
+                     magnitude=5, duration=50, rng=None):
+    """
+    Injects labelled anomalies of several kinds into a time series.
+
+    All anomalies of one kind are applied at once with fancy indexing, sized relative to the
+    standard deviation of the original data (computed once):
+    - spikes: single points moved up or down by `magnitude` standard deviations,
+    - level_shifts: segments of `duration` points moved up or down by `magnitude` standard
+      deviations,
+    - variance_bursts: segments with added Gaussian noise of `magnitude` standard deviations,
+    - collective: segments frozen at their first value (a stuck sensor), which are unusual
+      as a run although no single value is extreme.
+
+    Parameters:
+    - data: np.array
+        The original time series data.
+    - spikes, level_shifts, variance_bursts, collective: int
+        Number of anomalies of each kind.
+    - magnitude: float
+        Size of the anomalies in standard deviations of the data.
+    - duration: int
+        Length of the segment anomalies.
+    - rng: np.random.Generator or int, optional
+        Random generator or seed; None draws fresh entropy.
+
+    Returns:
+    - data_with_anomalies: np.array
+        Float64 copy of the data with the anomalies applied.
+    - labels: np.array of bool
+        Ground truth: True at every point changed by an anomaly.
+    """
+    if data is None:
+        raise ValueError("Data cannot be None.")
+    rng = np.random.default_rng(rng)
+    data_with_anomalies = np.array(data, dtype=np.float64)
+    n = len(data_with_anomalies)
+    labels = np.zeros(n, dtype=bool)
+    scale = magnitude * np.std(data_with_anomalies)
+
+    if spikes:
+        indices = rng.choice(n, spikes, replace=False)
+        data_with_anomalies[indices] += rng.choice([1.0, -1.0], spikes) * scale
+        labels[indices] = True
+
+    segment_counts = (level_shifts, variance_bursts, collective)
+    if any(segment_counts):
+        if duration < 1 or duration > n:
+            raise ValueError("duration must be between 1 and the length of the data.")
+        offsets = np.arange(duration)
+        for kind, count in enumerate(segment_counts):
+            if not count:
+                continue
+            # One row of indices per segment
+            segments = rng.choice(n - duration + 1, count, replace=False)[:, np.newaxis] + offsets
+            if kind == 0:
+                data_with_anomalies[segments] += rng.choice([1.0, -1.0], (count, 1)) * scale
+            elif kind == 1:
+                data_with_anomalies[segments] += rng.normal(0, scale, segments.shape)
+            else:
+                data_with_anomalies[segments] = data_with_anomalies[segments[:, :1]]
+            labels[segments] = True
+
+    return data_with_anomalies, labels
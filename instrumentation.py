@@ -0,0 +1,296 @@
+"""
+Low-overhead stage timings and counters for the detectors.
+
+The detectors wrap their main stages (window statistics, threshold comparison,
+decomposition, ESD test, ...) in `stage(name)` blocks and report `count(name, n)`
+counters once per call, never per sample. Stage durations go into HDR-style histograms:
+values are bucketed by their power of two and a fixed number of sub-buckets, so the
+histogram has a bounded size and every percentile is accurate to about 1%.
+
+Instrumentation is off by default. While it is off, `stage` returns a shared no-op
+context manager and `count` returns immediately, so a detector call pays one function
+call per stage and nothing per sample. Enable it with `enable()` or by setting the
+ANOMALY_INSTRUMENTATION environment variable to 1 before this module is imported.
+
+Example:
+    import instrumentation
+    instrumentation.enable()
+    sh_esd(data_stream, period=100)
+    print(instrumentation.snapshot()['stages']['sh_esd.decompose']['p99_ns'])
+"""
+import json
+import os
+import threading
+import time
+
+# Whether stages and counters are recorded
+enabled = os.environ.get("ANOMALY_INSTRUMENTATION", "").lower() in ("1", "true", "yes", "on")
+
+# Sub-bucket resolution of the histograms: 2 ** 7 sub-buckets per power of two (< 1% error)
+SUB_BUCKET_BITS = 7
+PERCENTILES = (50, 90, 99, 99.9)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+class Histogram:
+    """
+    Log-linear histogram of non-negative integers (HDR-style).
+
+    Values below 2 ** sub_bucket_bits are counted exactly; larger values share a bucket
+    with the values that agree with them in their top `sub_bucket_bits + 1` bits, which
+    bounds the relative error of any reported percentile by 2 ** -sub_bucket_bits.
+
+    Parameters:
+    - sub_bucket_bits: int, optional (default=SUB_BUCKET_BITS)
+        Log2 of the number of sub-buckets per power of two.
+    """
+
+    def __init__(self, sub_bucket_bits=SUB_BUCKET_BITS):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = [0] * ((64 - sub_bucket_bits + 1) << sub_bucket_bits)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        exponent = value.bit_length() - 1
+        if exponent < self.sub_bucket_bits:
+            return value
+        shift = exponent - self.sub_bucket_bits
+        # Top bits of the value, without the leading one, select the sub-bucket
+        return ((shift + 1) << self.sub_bucket_bits) + (value >> shift) - (1 << self.sub_bucket_bits)
+
+    def _bucket_value(self, bucket):
+        # Midpoint of the range of values falling into the bucket
+        shift = (bucket >> self.sub_bucket_bits) - 1
+        if shift < 0:
+            return bucket
+        low = ((bucket & ((1 << self.sub_bucket_bits) - 1)) + (1 << self.sub_bucket_bits)) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def record(self, value, times=1):
+        """
+        Adds `times` occurrences of `value` (clipped to [0, 2 ** 63)).
+        """
+        value = min(max(int(value), 0), (1 << 63) - 1)
+        self.counts[self._bucket(value)] += times
+        self.count += times
+        self.total += value * times
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q):
+        """
+        Value at percentile `q` (0 to 100), or None for an empty histogram.
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(round(q / 100 * self.count)))
+        seen = 0
+        for bucket, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(max(self._bucket_value(bucket), self.min), self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Count, total, min, max, mean and the PERCENTILES of the recorded values.
+        """
+        summary = {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else None,
+        }
+        for q in PERCENTILES:
+            summary[f"p{q:g}"] = self.percentile(q)
+        return summary
+
+
+class _NullStage:
+    # Shared no-op stage used while instrumentation is disabled; sample counts are ignored
+    __slots__ = ()
+
+    samples = property(lambda self: 0, lambda self, samples: None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_null_stage = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'samples', 'start')
+
+    def __init__(self, name, samples):
+        self.name = name
+        self.samples = samples
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        elapsed = time.perf_counter_ns() - self.start
+        record(self.name, elapsed)
+        if self.samples:
+            record(f"{self.name}.mean_per_sample", elapsed // self.samples)
+        return False
+
+
+def enable():
+    """
+    Starts recording stages and counters.
+    """
+    global enabled
+    enabled = True
+
+
+def disable():
+    """
+    Stops recording; already recorded data is kept until `reset`.
+    """
+    global enabled
+    enabled = False
+
+
+def stage(name, samples=0):
+    """
+    Context manager timing one stage of a detector, in nanoseconds.
+
+    Parameters:
+    - name: str
+        Histogram name, "<detector>.<stage>" by convention.
+    - samples: int, optional (default=0)
+        Number of samples the stage processes. When given, the stage time divided by it is
+        also recorded in the "<name>.mean_per_sample" histogram, once per stage: its
+        percentiles are over blocks, not over individual samples, which are never timed.
+        Stages over an iterator of unknown length can set `samples` on the object bound
+        by `with ... as` before the block ends instead.
+
+    Returns:
+    - A context manager; a shared no-op one while instrumentation is disabled.
+    """
+    if not enabled:
+        return _null_stage
+    return _Stage(name, samples)
+
+
+def count(name, n=1):
+    """
+    Adds `n` to the counter `name`.
+    """
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + int(n)
+
+
+def record(name, value, times=1):
+    """
+    Records `value` in the histogram `name`.
+    """
+    if not enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.record(value, times)
+
+
+def snapshot(reset_after=False):
+    """
+    Current counters and histogram summaries.
+
+    Parameters:
+    - reset_after: bool, optional (default=False)
+        Clear all recorded data after taking the snapshot, so consecutive snapshots
+        cover disjoint intervals.
+
+    Returns:
+    - snapshot: dict
+        {'timestamp': float, 'counters': {name: int}, 'stages': {name: summary}}, where a
+        stage summary holds 'count', 'total_ns', 'min_ns', 'max_ns', 'mean_ns' and the
+        'p50_ns' ... 'p99.9_ns' percentiles.
+    """
+    with _lock:
+        stages = {name: {f"{key}_ns" if key != 'count' else key: value
+                         for key, value in histogram.summary().items()}
+                  for name, histogram in _histograms.items()}
+        counters = dict(_counters)
+        if reset_after:
+            _histograms.clear()
+            _counters.clear()
+    return {'timestamp': time.time(), 'counters': counters, 'stages': stages}
+
+
+def reset():
+    """
+    Clears all counters and histograms.
+    """
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+class PeriodicDump(threading.Thread):
+    """
+    Daemon thread appending a snapshot to a file as one JSON line every `interval` seconds.
+
+    Parameters:
+    - path: str
+        File the snapshots are appended to.
+    - interval: float, optional (default=10.0)
+        Seconds between snapshots.
+    - reset_after: bool, optional (default=False)
+        Clear the recorded data after each snapshot, so every line covers one interval.
+    """
+
+    def __init__(self, path, interval=10.0, reset_after=False):
+        super().__init__(name="instrumentation-dump", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.reset_after = reset_after
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        """
+        Appends one snapshot to the file.
+        """
+        line = json.dumps(snapshot(self.reset_after))
+        with open(self.path, 'a') as dump_file:
+            dump_file.write(line + '\n')
+
+    def stop(self, final_dump=True):
+        """
+        Stops the thread, writing a last snapshot unless `final_dump` is False.
+        """
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+        if final_dump:
+            self.dump()
+
+
+def start_periodic_dump(path, interval=10.0, reset_after=False):
+    """
+    Starts a `PeriodicDump` thread and returns it; call its `stop()` to end it.
+    """
+    dumper = PeriodicDump(path, interval, reset_after)
+    dumper.start()
+    return dumper
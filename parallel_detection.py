@@ -0,0 +1,152 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from anomaly_results import as_series_matrix, deduplicate_records
+from detect_anomalies_emwa import detect_anomalies_ewma_multi
+from detect_anomalies_sh_esd import sh_esd_multi
+from detect_anomalies_zscore import detect_anomalies_zscore_batch, detect_anomalies_zscore_multi
+
+# Detectors that can be sharded across series, by name
+MULTI_SERIES_DETECTORS = {
+    'zscore': detect_anomalies_zscore_multi,
+    'ewma': detect_anomalies_ewma_multi,
+    'sh_esd': sh_esd_multi,
+}
+
+
+def parallel_detect_zscore(data_stream, window_size=50, threshold=3, max_workers=None, chunk_size=None):
+    """
+    Z-score anomaly detection on one long series, split into chunks across processes.
+
+    Each chunk is scored together with the `window_size` values before it, so every point
+    sees exactly the window it would see in a serial run and the merged result is identical
+    to `detect_anomalies_zscore_batch` on the whole series. The series is placed in shared
+    memory once; workers read their chunk from it instead of receiving a pickled copy.
+
+    Parameters:
+    - data_stream: np.array
+        The data stream to be analyzed for anomalies.
+
+    - window_size: int, optional (default=50)
+        The size of the rolling window used for calculating the moving mean and standard deviation.
+
+    - threshold: float, optional (default=3)
+        The number of standard deviations above or below the mean to consider as an anomaly.
+
+    - max_workers: int, optional (default=None)
+        Number of worker processes. Defaults to the number of CPUs.
+
+    - chunk_size: int, optional (default=None)
+        Number of points scored per task. Defaults to an even split across the workers.
+
+    Returns:
+    - anomaly_indices: np.array of int64
+        Indices of the detected anomalies in increasing order.
+    """
+    data = np.asarray(data_stream, dtype=np.float64)
+    max_workers = max_workers or os.cpu_count() or 1
+    n = len(data)
+    if chunk_size is None:
+        chunk_size = max(-(-n // max_workers), window_size)
+    starts = range(window_size, n, chunk_size)
+    if max_workers == 1 or len(starts) <= 1:
+        return detect_anomalies_zscore_batch(data, window_size, threshold)
+
+    with _SharedArray(data) as shared, ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(_zscore_chunk, shared.spec, start, min(start + chunk_size, n),
+                                   window_size, threshold)
+                   for start in starts]
+        results = [future.result() for future in futures]
+    # Chunks only score their own points, but drop any duplicates defensively
+    return np.unique(np.concatenate(results)).astype(np.int64)
+
+
+def parallel_detect_multi(detector, data, max_workers=None, **detector_kwargs):
+    """
+    Runs a multi-series detector with the series split across processes.
+
+    Parameters:
+    - detector: str
+        One of 'zscore', 'ewma' or 'sh_esd' (see MULTI_SERIES_DETECTORS).
+
+    - data: np.array
+        Array of shape (num_series, length), one series per row.
+
+    - max_workers: int, optional (default=None)
+        Number of worker processes. Defaults to the number of CPUs.
+
+    - detector_kwargs:
+        Parameters passed on to the detector, e.g. window_size or period.
+
+    Returns:
+    - anomalies: np.array with dtype anomaly_results.ANOMALY_DTYPE
+        The same records the detector returns for the whole array in one process.
+    """
+    if detector not in MULTI_SERIES_DETECTORS:
+        raise ValueError(f"Unknown detector '{detector}'. Choose from {sorted(MULTI_SERIES_DETECTORS)}.")
+    data = as_series_matrix(data)
+    max_workers = max_workers or os.cpu_count() or 1
+    num_series = len(data)
+    if max_workers == 1 or num_series <= 1:
+        return MULTI_SERIES_DETECTORS[detector](data, **detector_kwargs)
+
+    bounds = np.linspace(0, num_series, min(max_workers, num_series) + 1).astype(int)
+    with _SharedArray(data) as shared, ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(_multi_series_shard, shared.spec, detector, first, last, detector_kwargs)
+                   for first, last in zip(bounds[:-1], bounds[1:])]
+        results = [future.result() for future in futures]
+
+    # Shards cover disjoint series, but drop any duplicates defensively
+    return deduplicate_records(np.concatenate(results))
+
+
+class _SharedArray:
+    """
+    Copies an array into a shared memory block for the lifetime of a `with` block.
+    """
+
+    def __init__(self, array):
+        self._memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=self._memory.buf)
+        view[...] = array
+        del view
+        # Everything a worker needs to attach to the block
+        self.spec = (self._memory.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._memory.close()
+        self._memory.unlink()
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _zscore_chunk(spec, start, stop, window_size, threshold):
+    memory, data = _attach(spec)
+    try:
+        # Score points start..stop-1, with the preceding window as context
+        indices = detect_anomalies_zscore_batch(data[start - window_size:stop], window_size, threshold)
+    finally:
+        del data
+        memory.close()
+    return indices + (start - window_size)
+
+
+def _multi_series_shard(spec, detector, first, last, detector_kwargs):
+    memory, data = _attach(spec)
+    try:
+        records = MULTI_SERIES_DETECTORS[detector](data[first:last], **detector_kwargs)
+    finally:
+        del data
+        memory.close()
+    records['series_id'] += first
+    return records
@@ -0,0 +1,242 @@
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+Decomposition = namedtuple('Decomposition', ['trend', 'seasonal', 'resid'])
+
+# estimate_period picks the shortest lag whose autocorrelation peak reaches this fraction
+# of the highest peak
+PEAK_TOLERANCE = 0.9
+
+
+def decompose_additive(data, period):
+    """
+    Additive seasonal decomposition by moving averages in pure NumPy.
+
+    Computes the same components as statsmodels'
+    `seasonal_decompose(data, period=period, model='additive', extrapolate_trend='freq')`
+    (up to floating-point rounding) without pandas or statsmodels:
+    - trend: centered moving average over one period (a 2 x period average for even
+      periods), from blockwise cumulative sums, with the `period // 2` undefined values at
+      each end extrapolated by a least-squares line through the `period` nearest values,
+    - seasonal: mean of the detrended values of each phase, from a (cycles, period) reshape,
+      centered to zero mean and tiled,
+    - resid: data minus trend minus seasonal.
+
+    Parameters:
+    - data: np.array
+        A series, or an array of shape (num_series, length) with one series per row.
+
+    - period: int
+        The seasonal period; the series need at least 2 * period values.
+
+    Returns:
+    - decomposition: Decomposition
+        Named tuple of trend, seasonal and resid arrays with the shape of `data`.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    series = np.atleast_2d(data)
+    n = series.shape[1]
+    if period < 1:
+        raise ValueError("period must be a positive integer.")
+    if n < 2 * period:
+        raise ValueError(f"x must have 2 complete cycles requires {2 * period} "
+                         f"observations. x only has {n} observation(s)")
+    if not np.all(np.isfinite(series)):
+        raise ValueError("This function does not handle missing values")
+
+    trend = _extrapolate_trend(_centered_moving_average(series, period), period)
+    detrended = series - trend
+
+    # Mean of every phase over the full cycles plus the partial last cycle
+    cycles = n // period
+    full = cycles * period
+    sums = detrended[:, :full].reshape(len(series), cycles, period).sum(axis=1)
+    counts = np.full(period, cycles)
+    remainder = n - full
+    sums[:, :remainder] += detrended[:, full:]
+    counts[:remainder] += 1
+    period_averages = sums / counts
+    period_averages -= period_averages.mean(axis=1, keepdims=True)
+
+    seasonal = np.tile(period_averages, (1, cycles + 1))[:, :n]
+    resid = detrended - seasonal
+
+    if data.ndim == 1:
+        return Decomposition(trend[0], seasonal[0], resid[0])
+    return Decomposition(trend, seasonal, resid)
+
+
+def _centered_moving_average(series, period):
+    # statsmodels' two-sided filter: equal weights for odd periods, half weights on the two
+    # end points for even ones; the period // 2 values at each end are NaN
+    n = series.shape[1]
+    half = period // 2
+    sums = _moving_sums(series, period)
+    trend = np.full(series.shape, np.nan)
+    if period % 2:
+        trend[:, half:n - half] = sums / period
+    else:
+        trend[:, half:n - half] = (sums[:, :-1] + sums[:, 1:]) / (2 * period)
+    return trend
+
+
+def _moving_sums(series, window):
+    """
+    Sums of every `window` consecutive values of each row.
+
+    The rows are cut into overlapping blocks of a few windows; each block is centered on its
+    own mean before its cumulative sum is taken, so the rounding error of a window sum
+    depends on the local spread of the data, not on the length or offset of the series.
+    The blocks overlap by window - 1 values, which costs at most 1/8 of extra work.
+    """
+    rows, n = series.shape
+    count = n - window + 1
+    block_size = max(8 * window, 64)
+    num_blocks = -(-count // block_size)
+
+    padded = np.empty((rows, num_blocks * block_size + window - 1))
+    padded[:, :n] = series
+    padded[:, n:] = series[:, -1:]  # Repeat the last value, so the last block stays centered
+    blocks = sliding_window_view(padded, block_size + window - 1, axis=1)[:, ::block_size]
+    centers = blocks.mean(axis=2, keepdims=True)
+    cumulative = np.zeros(blocks.shape[:2] + (block_size + window,))
+    np.cumsum(blocks - centers, axis=2, out=cumulative[:, :, 1:])
+    sums = cumulative[:, :, window:] - cumulative[:, :, :-window] + window * centers
+    return sums.reshape(rows, -1)[:, :count]
+
+
+def _extrapolate_trend(trend, period):
+    # Same least-squares fits as statsmodels' _extrapolate_trend with npoints = period,
+    # including its choice of points at the back end
+    n = trend.shape[1]
+    front = period // 2
+    back = n - 1 - front
+    front_last = min(front + period, back)
+    back_first = max(front, back - period)
+
+    for first, last, targets in ((front, front_last, np.arange(0, front)),
+                                 (back_first, back, np.arange(back + 1, n))):
+        design = np.c_[np.arange(first, last), np.ones(last - first)]
+        slope, intercept = np.linalg.lstsq(design, trend[:, first:last].T, rcond=-1)[0]
+        trend[:, targets] = targets * slope[:, np.newaxis] + intercept[:, np.newaxis]
+    return trend
+
+
+def estimate_period(data, min_period=2, max_period=None, max_samples=None, min_correlation=0.1):
+    """
+    Estimates the dominant seasonal period of a series from its autocorrelation.
+
+    The series is detrended with a least-squares line, and its autocorrelation at all lags
+    is computed at once with an FFT in O(n log n). Candidates are the local maxima of the
+    autocorrelation after it first turns negative (the decay of the short-range
+    correlation is not a period). Multiples of the period peak about as high as the period
+    itself, so the estimate is the highest peak near the first one within PEAK_TOLERANCE
+    of the highest, refined with the positions of the peaks at its multiples.
+
+    Series longer than `max_samples` are first decimated by averaging blocks of
+    q = ceil(n / max_samples) values. The period found on the decimated copy is then
+    refined by computing the full-resolution autocorrelation at the lags within q of it.
+    Periods shorter than a few q are averaged away or aliased by the decimation, which then
+    finds nothing or a multiple of the period. So when it finds nothing or a period of at
+    most max_samples / 4, the estimate is redone at full resolution on the first
+    `max_samples` values, which hold at least four cycles of such a period.
+
+    Parameters:
+    - data: np.array
+        The series.
+
+    - min_period: int, optional (default=2)
+        Shortest period considered.
+
+    - max_period: int, optional (default=None)
+        Longest period considered. Defaults to half the length of the series, the longest
+        period the seasonal decomposition accepts.
+
+    - max_samples: int, optional (default=None)
+        Decimate series longer than this before the FFT. None never decimates.
+
+    - min_correlation: float, optional (default=0.1)
+        Lowest autocorrelation a peak needs to count as a period.
+
+    Returns:
+    - period: int or None
+        The estimated period, or None if no autocorrelation peak in range reaches
+        `min_correlation`.
+    """
+    values = _detrend(np.asarray(data, dtype=np.float64))
+    n = len(values)
+    if max_period is None:
+        max_period = n // 2
+    max_period = min(max_period, n - 1)
+    if n < 3 or max_period < min_period:
+        return None
+
+    if max_samples is not None and n > max_samples:
+        factor = -(-n // max_samples)
+        blocks = n // factor
+        coarse = _detrend(values[:blocks * factor].reshape(blocks, factor).mean(axis=1))
+        period = _autocorrelation_peak(coarse, max(-(-min_period // factor), 2), max_period // factor,
+                                       min_correlation)
+        if period is not None:
+            # Best full-resolution lag next to the coarse estimate
+            lags = np.arange(max((period - 1) * factor, min_period), min((period + 1) * factor, max_period) + 1)
+            covariances = [np.dot(values[:-lag], values[lag:]) for lag in lags]
+            period = int(lags[np.argmax(covariances)])
+        if period is None or period <= max_samples // 4:
+            segment = _detrend(values[:max_samples])
+            short_period = _autocorrelation_peak(segment, min_period, min(max_period, max_samples // 2),
+                                                 min_correlation)
+            if short_period is not None:
+                period = short_period
+        return period
+
+    return _autocorrelation_peak(values, min_period, max_period, min_correlation)
+
+
+def _detrend(values):
+    # Residuals of a least-squares line through the values
+    positions = np.arange(len(values)) - (len(values) - 1) / 2
+    centered = values - values.mean()
+    scale = np.dot(positions, positions)
+    if scale > 0:
+        centered -= positions * (np.dot(positions, centered) / scale)
+    return centered
+
+
+def _autocorrelation_peak(values, min_period, max_period, min_correlation):
+    # Lag of the autocorrelation peak of the period in [min_period, max_period]
+    n = len(values)
+    if n < 3 or max_period < min_period:
+        return None
+    # Zero padding to at least 2n - 1 values turns the circular correlation into a linear one
+    size = 1 << (2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(values, size)
+    autocovariance = np.fft.irfft(spectrum.real**2 + spectrum.imag**2, size)[:max_period + 2]
+    if autocovariance[0] <= 0:
+        return None  # Constant series
+    acf = autocovariance / autocovariance[0]
+
+    lags = np.arange(1, min(max_period, n - 2) + 1)
+    peaks = lags[(acf[lags] > acf[lags - 1]) & (acf[lags] >= acf[lags + 1])]
+    negative = np.flatnonzero(acf < 0)
+    if len(negative):
+        peaks = peaks[peaks > negative[0]]
+    peaks = peaks[(peaks >= min_period) & (acf[peaks] >= min_correlation)]
+    if not len(peaks):
+        return None
+    # Multiples of the period peak almost as high, so start from the first peak close to the
+    # highest; noise can split a broad peak, so take the highest peak before the next multiple
+    first = peaks[np.argmax(acf[peaks] >= PEAK_TOLERANCE * acf[peaks].max())]
+    peaks = peaks[(peaks >= first) & (peaks < 1.5 * first)]
+    period = peaks[np.argmax(acf[peaks])]
+
+    # The peaks at multiples of the period locate it more precisely: a peak found a few lags
+    # off at m * period moves the estimate by only a few / m lags
+    multiples = np.arange(1, max(min(max_period, n // 4) // period, 1) + 1)
+    if len(multiples) > 1:
+        locations = [m * period - period // 4 + np.argmax(acf[m * period - period // 4:m * period + period // 4 + 1])
+                     for m in multiples]
+        period = round(np.dot(multiples, locations) / np.dot(multiples, multiples))
+    return int(min(max(period, min_period), max_period))
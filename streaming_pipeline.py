@@ -0,0 +1,351 @@
+import asyncio
+import functools
+import inspect
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+from data_io import LineBuffer, _parse_numbers, iter_text_chunks
+from generate_data import RateLimiter
+
+# One detected anomaly as it flows from the detectors to the sinks
+AnomalyEvent = namedtuple('AnomalyEvent', ['detector', 'index', 'value'])
+
+# Marks the end of the stream in the pipeline queues
+_END = object()
+
+
+class StreamingPipeline:
+    """
+    Asyncio pipeline connecting a data source to streaming detectors and sinks.
+
+    The source, the detectors and the sinks run as three concurrent tasks connected by
+    bounded queues. When a downstream stage falls behind, `put` on its queue waits, which
+    slows the upstream stage down instead of dropping data (backpressure). Detection runs
+    in a worker thread so the event loop keeps ingesting and emitting in the meantime.
+
+    Parameters:
+    - source: async iterable of np.array
+        Yields consecutive blocks of the data stream (see the *_source functions below).
+    - detectors: dict
+        Maps a name to a streaming detector with an `update_batch(values)` method, such as
+        StreamingZScoreDetector, EWMADetector or StreamingSHESD.
+    - sinks: list
+        Async or plain callables taking a list of AnomalyEvent (FileSink, SocketSink, CallbackSink).
+    - queue_size: int, optional (default=8)
+        Maximum number of blocks / event batches waiting between two stages.
+    """
+
+    def __init__(self, source, detectors, sinks, queue_size=8):
+        if not detectors:
+            raise ValueError("At least one detector is required.")
+        self.source = source
+        self.detectors = detectors
+        self.sinks = list(sinks)
+        self.queue_size = queue_size
+        self.samples_processed = 0
+        self.anomalies_emitted = 0
+
+    async def run(self):
+        """
+        Runs the pipeline until the source is exhausted and all events are emitted.
+
+        Returns:
+        - stats: dict
+            Number of samples processed and anomalies emitted.
+        """
+        blocks = asyncio.Queue(self.queue_size)
+        events = asyncio.Queue(self.queue_size)
+        tasks = [
+            asyncio.create_task(self._ingest(blocks)),
+            asyncio.create_task(self._detect(blocks, events)),
+            asyncio.create_task(self._emit(events)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for sink in self.sinks:
+                close = getattr(sink, 'close', None)
+                if close is not None:
+                    result = close()
+                    if inspect.isawaitable(result):
+                        await result
+        return {'samples_processed': self.samples_processed, 'anomalies_emitted': self.anomalies_emitted}
+
+    async def _ingest(self, blocks):
+        async for block in self.source:
+            await blocks.put(np.asarray(block, dtype=np.float64))
+        await blocks.put(_END)
+
+    async def _detect(self, blocks, events):
+        loop = asyncio.get_running_loop()
+        while True:
+            block = await blocks.get()
+            if block is _END:
+                break
+            batch = await loop.run_in_executor(None, self._detect_block, block)
+            self.samples_processed += len(block)
+            if batch:
+                await events.put(batch)
+        await events.put(_END)
+
+    def _detect_block(self, block):
+        batch = []
+        for name, detector in self.detectors.items():
+            batch.extend(AnomalyEvent(name, index, value) for index, value in detector.update_batch(block))
+        return batch
+
+    async def _emit(self, events):
+        while True:
+            batch = await events.get()
+            if batch is _END:
+                break
+            for sink in self.sinks:
+                result = sink(batch)
+                if inspect.isawaitable(result):
+                    await result
+            self.anomalies_emitted += len(batch)
+
+
+def run_pipeline(source, detectors, sinks, queue_size=8):
+    """
+    Builds a StreamingPipeline and runs it to completion in a new event loop.
+    """
+    return asyncio.run(StreamingPipeline(source, detectors, sinks, queue_size).run())
+
+
+async def file_tail_source(file_path, block_size=4096, poll_interval=0.1, follow=True, skip_header=0):
+    """
+    Streams numbers (one per line) from a text file, optionally following appended data.
+
+    Parameters:
+    - file_path: str
+        Path of the text file.
+    - block_size: int, optional (default=4096)
+        Maximum number of values per yielded block.
+    - poll_interval: float, optional (default=0.1)
+        Seconds to wait before checking for new data at the end of the file.
+    - follow: bool, optional (default=True)
+        Keep waiting for new lines like `tail -f`; if False, stop at the end of the file.
+    - skip_header: int, optional (default=0)
+        Number of lines to skip at the beginning of the file.
+
+    Yields:
+    - block: np.array of float64
+    """
+    if not follow:
+        for block in iter_text_chunks(file_path, chunk_size=25 * block_size, skip_header=skip_header):
+            yield block
+            await asyncio.sleep(0)
+        return
+
+    with open(file_path, 'rb') as file:
+        for _ in range(skip_header):
+            file.readline()
+        # A partially written last line waits for the rest
+        lines = LineBuffer()
+        while True:
+            chunk = await asyncio.to_thread(file.read, 25 * block_size)
+            if not chunk:
+                await asyncio.sleep(poll_interval)
+                continue
+            values = lines.feed(chunk)
+            if len(values):
+                yield values
+
+
+async def socket_source(host, port, protocol='tcp', block_size=4096, queue_size=64, overflow='block'):
+    """
+    Streams numbers sent as newline-separated text over TCP or UDP.
+
+    With TCP the socket is read only as fast as the pipeline consumes blocks, so the
+    sender is slowed down by TCP flow control. UDP has no flow control, so received
+    datagrams wait in a queue of at most `queue_size` datagrams. When it is full, `overflow`
+    decides what happens:
+    - 'block': stop reading the socket until the pipeline catches up. Datagrams then wait
+      in the operating system's socket buffer, which drops them once it is full.
+    - 'drop': discard new datagrams; the number dropped is reported as a warning when the
+      source closes.
+
+    Parameters:
+    - host: str
+        Host to connect to (TCP) or local address to bind (UDP).
+    - port: int
+        Port to connect to (TCP) or bind (UDP).
+    - protocol: str, optional (default='tcp')
+        'tcp' or 'udp'.
+    - block_size: int, optional (default=4096)
+        Approximate number of values per yielded block (TCP).
+    - queue_size: int, optional (default=64)
+        Maximum number of buffered datagrams (UDP).
+    - overflow: str, optional (default='block')
+        'block' or 'drop', what to do with datagrams when the queue is full (UDP).
+
+    Yields:
+    - block: np.array of float64
+    """
+    if protocol == 'tcp':
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            lines = LineBuffer()
+            while True:
+                chunk = await reader.read(25 * block_size)
+                if not chunk:
+                    break
+                values = lines.feed(chunk)
+                if len(values):
+                    yield values
+            values = lines.flush()
+            if len(values):
+                yield values
+        finally:
+            writer.close()
+    elif protocol == 'udp':
+        if overflow not in ('block', 'drop'):
+            raise ValueError("overflow must be 'block' or 'drop'.")
+        loop = asyncio.get_running_loop()
+        transport, datagrams = await loop.create_datagram_endpoint(
+            lambda: _DatagramQueue(queue_size, overflow), local_addr=(host, port))
+        try:
+            while True:
+                values = _parse_numbers(await datagrams.get())
+                if len(values):
+                    yield values
+        finally:
+            transport.close()
+            if datagrams.dropped:
+                warnings.warn(f"socket_source dropped {datagrams.dropped} UDP datagrams because "
+                              f"the pipeline fell behind.", RuntimeWarning)
+    else:
+        raise ValueError("protocol must be 'tcp' or 'udp'.")
+
+
+async def generator_source(generate, block_size=1000, num_blocks=None, samples_per_second=None):
+    """
+    Streams blocks produced by a data generator such as those in generate_data.py.
+
+    Parameters:
+    - generate: callable or iterator
+        Either an iterator of blocks, e.g. generate_data.stream_seasonal_data(block_size),
+        which carries the model state across blocks, or a callable called as
+        generate(steps=block_size) for every block, e.g. generate_seasonal_data.
+    - block_size: int, optional (default=1000)
+        Number of values per block.
+    - num_blocks: int, optional (default=None)
+        Number of blocks to produce; None streams forever.
+    - samples_per_second: float, optional (default=None)
+        Emit at most this many values per second, on the schedule of a
+        generate_data.RateLimiter; None emits as fast as the pipeline consumes.
+
+    Yields:
+    - block: np.array of float64
+    """
+    limiter = RateLimiter(samples_per_second) if samples_per_second else None
+    produced = 0
+    if callable(generate):
+        make_block = functools.partial(generate, steps=block_size)
+    else:
+        make_block = functools.partial(next, iter(generate))
+    while num_blocks is None or produced < num_blocks * block_size:
+        block = np.asarray(await asyncio.to_thread(make_block), dtype=np.float64)
+        produced += len(block)
+        await asyncio.sleep(limiter.delay(len(block)) if limiter else 0)
+        yield block
+
+
+class FileSink:
+    """
+    Appends anomaly events to a text file as 'detector,index,value' lines.
+    """
+
+    def __init__(self, file_path):
+        self._file = open(file_path, 'a')
+
+    async def __call__(self, events):
+        await asyncio.to_thread(self._write, _format_events(events))
+
+    def _write(self, lines):
+        self._file.write(lines)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SocketSink:
+    """
+    Sends anomaly events over TCP as 'detector,index,value' lines.
+
+    Waits for the socket to drain after each batch, so a slow receiver applies
+    backpressure to the pipeline.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._writer = None
+
+    async def __call__(self, events):
+        if self._writer is None:
+            _, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(_format_events(events).encode())
+        await self._writer.drain()
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+
+class CallbackSink:
+    """
+    Calls `callback(event)` for every anomaly event; the callback may be a coroutine function.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    async def __call__(self, events):
+        for event in events:
+            result = self.callback(event)
+            if inspect.isawaitable(result):
+                await result
+
+
+class _DatagramQueue(asyncio.DatagramProtocol):
+    # Bounded queue of received datagrams; when it is full, reading is paused ('block') or
+    # the datagram is discarded ('drop')
+    def __init__(self, queue_size, overflow):
+        self._queue = asyncio.Queue(queue_size)
+        self._overflow = overflow
+        self._transport = None
+        self._paused = False
+        self.dropped = 0
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def datagram_received(self, data, addr):
+        if self._queue.full():
+            self.dropped += 1
+            return
+        self._queue.put_nowait(data)
+        if self._queue.full() and self._overflow == 'block':
+            pause_reading = getattr(self._transport, 'pause_reading', None)
+            if pause_reading is not None:
+                pause_reading()
+                self._paused = True
+
+    async def get(self):
+        data = await self._queue.get()
+        if self._paused:
+            self._paused = False
+            self._transport.resume_reading()
+        return data
+
+
+def _format_events(events):
+    return ''.join(f"{event.detector},{event.index},{float(event.value)!r}\n" for event in events)
@@ -1,9 +1,19 @@
+import bisect
+from collections import deque
+
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 
-def visualize_anomalies_static(data_stream, anomalies_list, algorithm_name):
+
+def visualize_anomalies_static(data_stream, anomalies_list, algorithm_name, num_buckets=None,
+                               output_path=None):
     """
     Visualizes the data stream and highlights detected anomalies in a static plot.
+
+    Long streams are reduced with `downsample_minmax` to the minimum and maximum of each of
+    about twice as many buckets as the axes are wide in pixels, keeping every anomaly index,
+    so plotting millions of points takes about as long as plotting a few thousand.
     
     Parameters:
     - data_stream: np.array
@@ -14,15 +24,26 @@ def visualize_anomalies_static(data_stream, anomalies_list, algorithm_name):
     
     - algorithm_name: str
         The name of the anomaly detection algorithm used.
+
+    - num_buckets: int, optional (default=None)
+        Number of min/max buckets the stream is reduced to. Defaults to twice the width of
+        the axes in pixels.
+
+    - output_path: str, optional (default=None)
+        Save the figure to this file (e.g. a PNG) and close it instead of showing it, which
+        works without a display.
     """
     fig, ax = plt.subplots(figsize=(12, 6))
-    
-    # Plot the data stream
-    ax.plot(data_stream, label='Data Stream')
-    
+
     # Extract anomaly indices and values
     anomaly_x = [idx for idx, _ in anomalies_list]
     anomaly_y = [value for _, value in anomalies_list]
+
+    # Plot the data stream, reduced to what the axes can show
+    if num_buckets is None:
+        num_buckets = 2 * int(ax.bbox.width)
+    x, y = downsample_minmax(data_stream, num_buckets, keep_indices=anomaly_x)
+    ax.plot(x, y, label='Data Stream')
     
     # Highlight anomalies
     ax.scatter(anomaly_x, anomaly_y, color='red', label='Anomalies', zorder=5)
@@ -35,42 +56,322 @@ def visualize_anomalies_static(data_stream, anomalies_list, algorithm_name):
     # Add a legend
     ax.legend(loc='upper right')
     
+    if output_path is not None:
+        fig.savefig(output_path)
+        plt.close(fig)
+        return
+
     # Display the plot
     plt.show()
 
 
-def visualize_anomalies(data_stream, anomalies_list, algorithm_name):
+def visualize_anomalies(data_stream, anomalies_list, algorithm_name, window_size=1000,
+                        samples_per_frame=None, interval=10):
     """
-    Visualizes the data stream and highlights detected anomalies.
-    
+    Visualizes the data stream and highlights detected anomalies in real time.
+
+    The stream is replayed through a `StreamingPlot` driven by a blitted FuncAnimation,
+    which shows a scrolling window of the most recent `window_size` points and redraws only
+    the data artists on each frame, so the cost of a frame does not grow with the length of
+    the stream. The animation runs on the backend's own timer, so interactive notebook
+    backends such as ipympl work too.
+
     Parameters:
     - data_stream: np.array
         The continuous data stream.
-    
+
     - anomalies_list: list of tuples
         A list of detected anomalies from the anomaly detection algorithm.
-    
+
     - algorithm_name: str
         The name of the anomaly detection algorithm used.
+
+    - window_size: int, optional (default=1000)
+        Number of most recent points shown.
+
+    - samples_per_frame: int, optional (default=None)
+        Number of new points added per frame. Defaults to one point per frame for streams
+        of up to 2000 points and about 2000 frames in total for longer ones.
+
+    - interval: float, optional (default=10)
+        Delay between frames in milliseconds.
+
+    Returns:
+    - animation: matplotlib.animation.FuncAnimation
+        The running animation. Keep a reference to it while it plays, e.g. in a notebook,
+        where `plt.show()` returns immediately.
     """
-    fig, ax = plt.subplots(figsize=(12, 6))
-    x_data = []
-    y_data = []
-    anomaly_x = [idx for idx, _ in anomalies_list]
-    anomaly_y = [value for _, value in anomalies_list]
+    data = np.asarray(data_stream, dtype=np.float64)
+    n = len(data)
+    if samples_per_frame is None:
+        samples_per_frame = max(1, n // 2000)
+    anomalies = sorted((int(index), value) for index, value in anomalies_list)
+    anomaly_indices = [index for index, _ in anomalies]
+
+    def blocks():
+        for start in range(0, n, samples_per_frame):
+            stop = min(start + samples_per_frame, n)
+            first = bisect.bisect_left(anomaly_indices, start)
+            last = bisect.bisect_left(anomaly_indices, stop)
+            yield data[start:stop], anomalies[first:last]
+
+    plot = StreamingPlot(algorithm_name, window_size)
+    ani = plot.animate(blocks(), interval=interval, num_frames=-(-n // samples_per_frame))
+    plt.show()
+    return ani
+
+
+class StreamingPlot:
+    """
+    Real-time plot of a live data stream and its anomalies using blitting.
+
+    The line and the anomaly markers are persistent artists updated with `set_data`. Only
+    they are redrawn on each frame, on top of a cached background holding the axes, ticks
+    and labels. The plot shows the last `window_size` points. Once the stream fills the
+    first window, the x-axis spans one and a half windows and advances by half a window at a
+    time, starting at the first shown point, and the y-axis only grows, so full redraws are
+    rare.
+
+    When the window holds more than `max_points` points, it is reduced to the minimum and
+    maximum of each of `max_points / 2` buckets before drawing, so spikes stay visible and
+    the work per frame is bounded by the width of the plot rather than the stream length.
+
+    Values are added either directly with `append`, which draws immediately, or frame by
+    frame by the FuncAnimation that `animate` returns, which then does the blitting.
+
+    Parameters:
+    - algorithm_name: str
+        The name of the anomaly detection algorithm used, shown in the title.
+
+    - window_size: int, optional (default=1000)
+        Number of most recent points shown.
+
+    - max_points: int, optional (default=None)
+        Maximum number of line points drawn per frame. Defaults to twice the width of the
+        axes in pixels.
+    """
+
+    def __init__(self, algorithm_name, window_size=1000, max_points=None):
+        if window_size < 2:
+            raise ValueError("window_size must be at least 2.")
+        self.window_size = window_size
+        self.max_points = max_points
+        self.samples_seen = 0
+
+        # Values are appended to a buffer of twice the window size and shifted back to its
+        # start when it is full, so appending costs amortized O(1) per value
+        self._buffer = np.empty(2 * window_size)
+        self._count = 0
+        self._anomalies = deque()
 
-    def animate(i):
-        x_data.append(i)
-        y_data.append(data_stream[i])
-        ax.clear()
-        ax.plot(x_data, y_data, label='Data Stream')
-        ax.scatter(anomaly_x, anomaly_y, color='red', label='Anomalies')
+        self.fig, self.ax = plt.subplots(figsize=(12, 6))
+        ax = self.ax
+        (self._line,) = ax.plot([], [], label='Data Stream', animated=True)
+        (self._markers,) = ax.plot([], [], 'o', color='red', label='Anomalies', animated=True)
         ax.set_title(f'Real-Time Anomaly Detection using {algorithm_name}')
         ax.set_xlabel('Time Steps')
         ax.set_ylabel('Value')
         ax.legend(loc='upper right')
-        ax.set_xlim(0, len(data_stream))
-        ax.set_ylim(min(data_stream) - 10, max(data_stream) + 10)
+        ax.set_xlim(0, window_size)
+        self._ylim = None
 
-    ani = animation.FuncAnimation(fig, animate, frames=len(data_stream), interval=10, repeat=False)
-    plt.show()
+        self.artists = (self._line, self._markers)
+
+        self._background = None
+        self._draw_cid = self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def append(self, values, anomalies=()):
+        """
+        Adds new values and the anomalies among them, then redraws the plot.
+
+        Parameters:
+        - values: np.array or list
+            The next values of the data stream.
+
+        - anomalies: list of tuples
+            (index, value) anomalies, with indices counted from the start of the stream.
+        """
+        self._draw(self.update(values, anomalies))
+
+    def update(self, values, anomalies=()):
+        """
+        Adds new values and the anomalies among them and updates the artists and axis
+        limits without drawing anything.
+
+        Returns:
+        - bool: True when the axis limits changed, so the background needs a full redraw.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.samples_seen += len(values)
+        self._push(values[-self.window_size:])  # Only the last window of a large block is shown
+        self._anomalies.extend(anomalies)
+        window_start = self.samples_seen - min(self._count, self.window_size)
+        while self._anomalies and self._anomalies[0][0] < window_start:
+            self._anomalies.popleft()
+        return self._update_artists()
+
+    def animate(self, blocks, interval=10, num_frames=None):
+        """
+        Returns a blitted FuncAnimation that appends one (values, anomalies) block of
+        `blocks` per frame.
+
+        The animation takes over the blitting: it caches the background of the axes and
+        redraws only `artists` on each frame. When the axis limits change, the frame first
+        redraws the whole figure, without the animated artists, so the cached background
+        is refreshed. The plot's own draw handler is disconnected, so it does not paint the
+        artists into that background.
+
+        Parameters:
+        - blocks: iterable of tuples
+            (values, anomalies) arguments of `update`, one per frame.
+
+        - interval: float, optional (default=10)
+            Delay between frames in milliseconds.
+
+        - num_frames: int, optional (default=None)
+            Number of blocks, if known.
+
+        Returns:
+        - animation: matplotlib.animation.FuncAnimation
+        """
+        self.fig.canvas.mpl_disconnect(self._draw_cid)
+
+        def frame(block):
+            if self.update(*block):
+                self.fig.canvas.draw()
+            return self.artists
+
+        return animation.FuncAnimation(self.fig, frame, frames=blocks, init_func=lambda: self.artists,
+                                       save_count=num_frames, interval=interval, blit=True, repeat=False,
+                                       cache_frame_data=False)
+
+    def _push(self, values):
+        if self._count + len(values) > len(self._buffer):
+            keep = self.window_size - len(values)
+            self._buffer[:keep] = self._buffer[self._count - keep:self._count]
+            self._count = keep
+        self._buffer[self._count:self._count + len(values)] = values
+        self._count += len(values)
+
+    def refresh(self):
+        """
+        Redraws the data artists; the background is redrawn only when the axes changed.
+        """
+        self._draw(self._update_artists())
+
+    def _update_artists(self):
+        # Sets the data of the artists and returns whether the axis limits changed
+        window = self._buffer[max(self._count - self.window_size, 0):self._count]
+        start = self.samples_seen - len(window)
+
+        max_points = self.max_points or max(2 * int(self.ax.bbox.width), 2)
+        if len(window) > max_points:
+            positions = _minmax_positions(window, max_points // 2)
+            x, y = positions + start, window[positions]
+        else:
+            x, y = np.arange(start, self.samples_seen), window
+        self._line.set_data(x, y)
+        if self._anomalies:
+            anomaly_x, anomaly_y = zip(*self._anomalies)
+        else:
+            anomaly_x, anomaly_y = (), ()
+        self._markers.set_data(anomaly_x, anomaly_y)
+        return self._update_limits(y, anomaly_y)
+
+    def _draw(self, limits_changed):
+        if limits_changed or self._background is None:
+            self.fig.canvas.draw()  # Full redraw; _on_draw caches the new background
+        else:
+            canvas = self.fig.canvas
+            canvas.restore_region(self._background)
+            self._draw_artists()
+            canvas.blit(self.fig.bbox)
+        self.fig.canvas.flush_events()
+
+    def _update_limits(self, y, anomaly_y):
+        changed = False
+        left, right = self.ax.get_xlim()
+        if self.samples_seen > right:
+            # Start at the first shown point and leave half a window of room on the right,
+            # so the axis changes only every half window
+            left = self.samples_seen - min(self._count, self.window_size)
+            self.ax.set_xlim(left, left + self.window_size + self.window_size // 2)
+            changed = True
+
+        finite = np.concatenate((y, np.asarray(anomaly_y, dtype=np.float64)))
+        finite = finite[np.isfinite(finite)]
+        if len(finite):
+            low, high = finite.min(), finite.max()
+            if self._ylim is None or low < self._ylim[0] or high > self._ylim[1]:
+                if self._ylim is not None:
+                    low, high = min(low, self._ylim[0]), max(high, self._ylim[1])
+                padding = max(0.1 * (high - low), 1.0)
+                self._ylim = (low - padding, high + padding)
+                self.ax.set_ylim(*self._ylim)
+                changed = True
+        return changed
+
+    def _on_draw(self, event):
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        self.ax.draw_artist(self._line)
+        self.ax.draw_artist(self._markers)
+
+
+def downsample_minmax(data_stream, num_buckets, keep_indices=None):
+    """
+    Reduces a series to the minimum and maximum of each of `num_buckets` equal-width buckets.
+
+    Both extremes of every bucket are kept at their original positions, so spikes and dips
+    survive the reduction and a line through the result looks like the full series at a
+    resolution of about `num_buckets / 2` pixels. Bucket extremes are found with vectorized
+    `reduceat`, in O(n) time and memory.
+
+    Parameters:
+    - data_stream: np.array
+        The series to reduce.
+
+    - num_buckets: int
+        Number of buckets. Series with at most 2 * num_buckets points are returned whole.
+
+    - keep_indices: list or np.array, optional (default=None)
+        Indices that are always kept, e.g. the detected anomalies.
+
+    Returns:
+    - x: np.array of int64
+        Kept indices in increasing order.
+
+    - y: np.array
+        The values at those indices.
+    """
+    data = np.asarray(data_stream)
+    n = len(data)
+    if n <= 2 * num_buckets:
+        x = np.arange(n)
+    else:
+        x = _minmax_positions(data, num_buckets)
+        if keep_indices is not None and len(keep_indices):
+            keep = np.asarray(keep_indices, dtype=np.int64)
+            x = np.union1d(x, keep[(keep >= 0) & (keep < n)])
+    return x, data[x]
+
+
+def _minmax_positions(values, num_buckets):
+    """
+    Positions of the first minimum and first maximum of each of `num_buckets` equal-width
+    buckets of `values`, in increasing order. NaNs are ignored.
+    """
+    n = len(values)
+    starts = np.arange(num_buckets) * n // num_buckets
+    sizes = np.diff(np.append(starts, n))
+    positions = []
+    for extreme in (np.fmin.reduceat(values, starts), np.fmax.reduceat(values, starts)):
+        hits = np.flatnonzero(values == np.repeat(extreme, sizes))
+        # Keep the first hit in every bucket
+        bucket = np.searchsorted(starts, hits, side='right')
+        first = np.ones(len(hits), dtype=bool)
+        first[1:] = bucket[1:] != bucket[:-1]
+        positions.append(hits[first])
+    return np.unique(np.concatenate(positions))